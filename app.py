@@ -1,21 +1,14 @@
-from flask import Flask, render_template, request, redirect, session, send_from_directory
+from flask import Flask, render_template, request, redirect, session, send_from_directory, send_file, url_for
 from utils.entity_classifier import classify_entity
 from utils.database import (
-    create_employee_table,
-    create_checklist_table,
-    create_file_tracking_table,
-    create_users_table,
-    create_activity_logs_table,
-    create_user_companies_table,
     insert_employee,
-    insert_checklist_entry,
+    insert_checklist_entries,
     insert_file_tracking_entry,
     add_user,
      insert_user_company,
     get_unique_companies,
     get_all_employees,
-    get_checklist_by_employee,
-    get_file_tracking_by_employee,
+    get_employee_detail,
     verify_user,
     get_employee_by_code,
     create_connection,
@@ -25,22 +18,41 @@ from utils.database import (
     delete_user,
     get_companies_by_user,
     get_employees_by_companies,
+    search_employees,
+    count_employees,
+    employee_sort_key,
+    EMPLOYEE_SORTS,
     update_tracking_email_and_return_date,
+    update_file_tracking_entry,
      get_employee_counts_by_company,
      get_file_counts_by_month,
+    init_app as init_db,
+    check_connection_profile,
+    get_activity_logs,
+    get_activity_actions,
 )
-from utils.logger import log_action
+import config
+from utils.logger import log_action, read_csv_tail
+from utils.dates import normalize_date
+from utils.sql_trace import init_app as init_sql_trace, slowest_queries
+from utils.migrations import verify_schema_version
+from utils.qr_generator import (
+    render_qr, qr_cache_key, QR_FORMATS, DEFAULT_BOX_SIZE, MAX_BOX_SIZE,
+)
+from utils.employee_import import import_employees
+from utils.outbox import queue_email, start_worker as start_outbox_worker
 from functools import wraps
-import qrcode
+import io
 import os
 import csv
-import smtplib
-from email.message import EmailMessage
+import json
+import base64
 from werkzeug.utils import secure_filename
 import pytesseract
 from PIL import Image
 pytesseract.pytesseract.tesseract_cmd = r'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
 import re
+import uuid
 from datetime import datetime
 
 
@@ -59,6 +71,8 @@ COMPANY_NAMES = [
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key'
+init_db(app)
+init_sql_trace(app)
 
 UPLOAD_FOLDER = 'uploads'
 CHECKLIST_FOLDER = os.path.join(UPLOAD_FOLDER, 'checklists')
@@ -67,6 +81,10 @@ PROFILE_FOLDER = os.path.join(UPLOAD_FOLDER, 'profiles')
 os.makedirs(PROFILE_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.pdf'}
+EMPLOYEES_PER_PAGE = 50
+MAX_EMPLOYEES_PER_PAGE = 200
+LOGS_PER_PAGE = 100
+QR_MAX_AGE = 365 * 24 * 3600
 
 # Mapping of locker code ranges to locker groups and numbers
 LOCKER_RANGES = [
@@ -153,44 +171,15 @@ def allowed_file(filename: str) -> bool:
     ext = os.path.splitext(filename)[1].lower()
     return ext in ALLOWED_EXTENSIONS
 
-create_employee_table()
-create_checklist_table()
-create_file_tracking_table()
-create_users_table()
-create_user_companies_table()
-create_activity_logs_table()
-
-def send_email(to_address: str, subject: str, body: str):
-    """Send an email using SMTP details from environment variables."""
-    smtp_server = os.environ.get("SMTP_SERVER")
-    smtp_port = int(os.environ.get("SMTP_PORT", "587"))
-    username = os.environ.get("SMTP_USERNAME")
-    password = os.environ.get("SMTP_PASSWORD")
-    sender = os.environ.get("EMAIL_FROM", username)
-
-    if not smtp_server or not username or not password:
-        print("SMTP credentials not configured; skipping email send")
-        return
-
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = sender
-    msg["To"] = to_address
-    msg.set_content(body)
+verify_schema_version()
 
-    try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(username, password)
-            server.send_message(msg)
-    except Exception as e:
-        print("Error sending email:", e)
-
-def generate_qr(employee_code):
-    qr_img = qrcode.make(f"http://192.168.1.142:5000/employee/{employee_code}?next=/employee/{employee_code}")
-    qr_path = f"static/qr_codes/{employee_code}.png"
-    os.makedirs(os.path.dirname(qr_path), exist_ok=True)
-    qr_img.save(qr_path)
+db_profile = check_connection_profile()
+print("SQLite profile:", ", ".join(f"{k}={v}" for k, v in db_profile.items()))
+if str(db_profile["journal_mode"]).lower() != config.SQLITE_JOURNAL_MODE.lower():
+    print(f"Warning: requested journal_mode={config.SQLITE_JOURNAL_MODE} but database is using {db_profile['journal_mode']}")
+
+# Resume sending anything left in the email outbox by a previous run.
+start_outbox_worker()
 
 def super_admin_required(f):
     """Allow only the super admin user."""
@@ -330,63 +319,71 @@ def delete_admin(user_id):
     log_action(session['username'], 'Delete User', f'Deleted admin {user_id}')
     return redirect('/manage_admins')
 
-def prepare_checklist_status(employee_id):
-    checklist_items = [
-        "Appointment Letter", "NDA Declaration", "Passport Photo", "Employment Form",
-        "Dependent Details Form", "ESI Declaration", "EPF Declaration",
-        "Form 25 Payment of Wages", "Gratuity Nomination", "NFA (Note for Approval)",
-        "Interview Assessment", "HR Interview Assessment", "Resume with Declaration",
-        "Vaccination Certificate", "Previous Experience Certificates", "SSLC Certificate",
-        "PUC Certificate", "Graduation Certificate", "Post Graduation Certificate",
-        "PAN Card", "Aadhar Card", "Bank Account Details"
-    ]
-
-    submitted = get_checklist_by_employee(employee_id)
-    submitted_dict = {item[0]: item for item in submitted}
-
-    return [{
-        'document_name': item,
-        'is_submitted': submitted_dict[item][1] if item in submitted_dict else 'Missed',
-        'verified_by': submitted_dict[item][2] if item in submitted_dict else '-',
-        'reviewed_by': submitted_dict[item][3] if item in submitted_dict else '-',
-        'verified_date': submitted_dict[item][4] if item in submitted_dict else '-',
-        'file_path': submitted_dict[item][5] if item in submitted_dict else None,
-        'uploaded_by': submitted_dict[item][6] if item in submitted_dict else None,
-        'upload_date': submitted_dict[item][7] if item in submitted_dict else None,
-    } for item in checklist_items]
-
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def encode_cursor(key):
+    """Opaque URL token for a keyset cursor."""
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; returns None for a missing or malformed token."""
+    if not token:
+        return None
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        return None
+    # Both parts are bound as query parameters, so only accept scalar types.
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int))):
+        return None
+    if isinstance(row_id, bool) or not isinstance(row_id, int):
+        return None
+    return value, row_id
+
 @app.route('/employees')
 @login_required
 def list_employees():
     search_query = request.args.get('search', '').strip()
     filter_by = request.args.get('filter', 'employee_code')
-
-    if session.get('user_role') == 'super_admin':
-        all_employees = get_all_employees()
-    else:
-        all_employees = get_employees_by_companies(session.get('company', []))
+    sort = request.args.get('sort', 'code')
+    if sort not in EMPLOYEE_SORTS:
+        sort = 'code'
+    per_page = request.args.get('per_page', EMPLOYEES_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), MAX_EMPLOYEES_PER_PAGE)
+    after = decode_cursor(request.args.get('after'))
+    before = None if after else decode_cursor(request.args.get('before'))
+
+    companies = None if session.get('user_role') == 'super_admin' else session.get('company', [])
+    # Fetch one extra row to learn whether another page exists in that direction.
     if search_query:
-        idx_map = {
-            'employee_code': 1,
-            'name': 2,
-            'department': 4,
-            'unit': 5,
-            'company': 6,
-        }
-        idx = idx_map.get(filter_by, 1)
-        employees = [emp for emp in all_employees if search_query.lower() in (emp[idx] or '').lower()]
+        rows = search_employees(search_query, filter_by, companies, sort, after, before, per_page + 1)
+    elif companies is None:
+        rows = get_all_employees(sort, after, before, per_page + 1)
     else:
-        employees = all_employees
+        rows = get_employees_by_companies(companies, sort, after, before, per_page + 1)
+    total = count_employees(search_query, filter_by, companies)
+
+    if before:
+        employees = rows[-per_page:]
+        has_prev, has_next = len(rows) > per_page, True
+    else:
+        employees = rows[:per_page]
+        has_prev, has_next = after is not None, len(rows) > per_page
+    prev_cursor = encode_cursor(employee_sort_key(employees[0], sort)) if has_prev and employees else None
+    next_cursor = encode_cursor(employee_sort_key(employees[-1], sort)) if has_next and employees else None
 
     return render_template(
         'list_employees.html',
         employees=employees,
         search_query=search_query,
         selected_filter=filter_by,
+        selected_sort=sort,
+        per_page=per_page,
+        total=total,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
     )
 
 @app.route('/add', methods=['GET', 'POST'])
@@ -397,108 +394,181 @@ def add_employee_route():
                                           'epf', 'esi', 'joining_date', 'retirement_date', 'leaving_date', 'uan']]
         detected_entity = classify_entity(data[0])
         insert_employee((*data, detected_entity))
-        generate_qr(data[0])
         log_action(session['username'], 'Add Employee', f"Added employee {data[0]}", data[0])
         return redirect('/employees')
     return render_template('add_employee.html')
 
+@app.route('/import_employees', methods=['GET', 'POST'])
+@admin_required
+def import_employees_route():
+    message = None
+    result = None
+    if request.method == 'POST':
+        uploaded = request.files.get('file')
+        if not uploaded or uploaded.filename == '':
+            message = "No file provided."
+        else:
+            allowed = None if session.get('user_role') == 'super_admin' else session.get('company', [])
+            stream = io.TextIOWrapper(uploaded.stream, encoding='utf-8-sig', newline='')
+            try:
+                result = import_employees(stream, allowed_companies=allowed)
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                message = f"Could not import file: {e}"
+            else:
+                log_action(session['username'], 'Import Employees', result.summary())
+    return render_template('import_employees.html', message=message, result=result)
+
+@app.template_global()
+def qr_url(employee_code, fmt='png', size=DEFAULT_BOX_SIZE):
+    """Versioned /qr URL, so the immutable response is refetched when the image changes."""
+    args = {'v': qr_cache_key(employee_code, size, fmt)[:16]}
+    if size != DEFAULT_BOX_SIZE:
+        args['size'] = size
+    return url_for('qr_image', employee_code=employee_code, fmt=fmt, **args)
+
+@app.route('/qr/<string:employee_code>.<fmt>')
+@login_required
+def qr_image(employee_code, fmt):
+    if fmt not in QR_FORMATS:
+        return "❌ Unsupported format", 404
+    size = request.args.get('size', DEFAULT_BOX_SIZE, type=int)
+    if not 1 <= size <= MAX_BOX_SIZE:
+        return f"❌ size must be between 1 and {MAX_BOX_SIZE}", 400
+    key = qr_cache_key(employee_code, size, fmt)
+    if key in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        if not get_employee_by_code(employee_code):
+            return "❌ Employee not found", 404
+        path, key = render_qr(employee_code, size, fmt)
+        response = send_file(path, mimetype=QR_FORMATS[fmt], etag=False, conditional=False,
+                             max_age=QR_MAX_AGE)
+    response.set_etag(key)
+    # Behind login, so shared caches must not keep a copy (send_file marks
+    # responses with a max_age public).
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = QR_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
 @app.route('/delete_employee/<string:employee_code>', methods=['POST'])
 @admin_required
 def delete_employee(employee_code):
-    conn = create_connection()
-    cursor = conn.cursor()
     log_action(session['username'], 'Delete Employee', f"Deleted employee {employee_code}", employee_code)
-    conn.commit()
-    conn.close()
     log_action(session['username'], 'Delete Employee', f"Deleted employee {employee_code}", employee_code)
     return redirect('/employees')
 
 @app.route('/add_checklist/<string:employee_code>', methods=['GET', 'POST'])
 @admin_required
 def add_checklist(employee_code):
-    employee = get_employee_by_code(employee_code)
+    employee, checklist, _ = get_employee_detail(
+        employee_code, checklist=request.method == 'GET', tracking=False)
     if not employee: return "❌ Employee not found", 404
     if request.method == 'POST':
         verified_by = request.form['verified_by']
         reviewed_by = request.form['reviewed_by']
         verified_date = request.form['verified_date']
+        uploads = []
         for item in request.form.getlist('checklist_items'):
             uploaded = request.files.get(f'file_{item}')
             if not uploaded or uploaded.filename == '':
                 return "File required for selected document", 400
             if not allowed_file(uploaded.filename):
                 return "Invalid file type", 400
-            ext = os.path.splitext(uploaded.filename)[1]
-            label = secure_filename(item.replace(' ', '_'))
-            filename = secure_filename(f"{employee_code}_{label}_{int(datetime.now().timestamp())}{ext}")
-            save_path = os.path.join(CHECKLIST_FOLDER, filename)
-            uploaded.save(save_path)
-            rel_path = os.path.join('checklists', filename)
-            insert_checklist_entry(
-                (
+            uploads.append((item, uploaded))
+
+        # Save every file first, then write all rows in one transaction;
+        # if anything fails, remove the files already written.
+        saved_paths = []
+        entries = []
+        upload_date = datetime.now().strftime('%Y-%m-%d')
+        try:
+            for item, uploaded in uploads:
+                ext = os.path.splitext(uploaded.filename)[1]
+                label = secure_filename(item.replace(' ', '_'))
+                # The random suffix keeps a cleanup from deleting another request's upload.
+                filename = secure_filename(
+                    f"{employee_code}_{label}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}{ext}")
+                save_path = os.path.join(CHECKLIST_FOLDER, filename)
+                uploaded.save(save_path)
+                saved_paths.append(save_path)
+                entries.append((
                     employee[0],
                     item,
                     "Yes",
                     verified_by,
                     reviewed_by,
                     verified_date,
-                    rel_path,
+                    os.path.join('checklists', filename),
                     session['username'],
-                    datetime.now().strftime('%Y-%m-%d'),
-                )
-            )
+                    upload_date,
+                ))
+            insert_checklist_entries(entries)
+        except Exception as e:
+            for path in saved_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            print("Checklist upload error:", e)
+            return "❌ Error saving checklist", 500
         log_action(session['username'], 'Add Checklist', f"Added checklist for {employee_code}", employee_code)
         return redirect('/employees')
     return render_template('add_checklist.html', employee_code=employee_code,
-                           checklist_items=prepare_checklist_status(employee[0]))
+                           checklist_items=checklist)
 
 @app.route('/add_file_tracking/<string:employee_code>', methods=['GET', 'POST'])
 @admin_required
 def add_file_tracking(employee_code):
-    employee = get_employee_by_code(employee_code)
+    employee, checklist_items, _ = get_employee_detail(
+        employee_code, checklist=request.method == 'GET', tracking=False)
     if not employee: return "❌ Employee not found", 404
     if request.method == 'POST':
         documents_taken = ",".join(request.form.getlist('documents_taken'))
-        insert_file_tracking_entry(
-            (
-                employee[0],
-                request.form['date_taken'],
-                request.form['taken_by'],
-                request.form.get('taken_by_email'),
-                request.form['file_taken_time'],
-                request.form['expected_return_date'],
-                documents_taken,
-                request.form['status_of_documents'],
+        taken_by_email = request.form.get('taken_by_email')
+        conn = create_connection()
+        with conn:
+            # The record and its confirmation email commit together.
+            insert_file_tracking_entry(
+                (
+                    employee[0],
+                    request.form['date_taken'],
+                    request.form['taken_by'],
+                    taken_by_email,
+                    request.form['file_taken_time'],
+                    request.form['expected_return_date'],
+                    documents_taken,
+                    request.form['status_of_documents'],
+                ),
+                conn,
             )
-        )
-        log_action(session['username'], 'Add File Tracking', f"Added file tracking for {employee_code}", employee_code)
 
-        # Send confirmation email to the person taking the file
-        taken_by_email = request.form.get('taken_by_email')
+            # Send confirmation email to the person taking the file
+            if taken_by_email:
+                taken_by_name = request.form['taken_by']
+                expected_return = request.form['expected_return_date']
+                subject = f"File Taken Confirmation for Employee Code {employee_code}"
+                body = (
+                    f"Hi {taken_by_name},\n\n"
+                    f"This is a confirmation that you have taken the file related to Employee Code: {employee_code}.\n\n"
+                    f"Please ensure the file is returned before {expected_return}.\n\n"
+                    "Thank you,\nAdmin Team"
+                )
+                queue_email(taken_by_email, subject, body, conn=conn, wake=False)
         if taken_by_email:
-            taken_by_name = request.form['taken_by']
-            expected_return = request.form['expected_return_date']
-            subject = f"File Taken Confirmation for Employee Code {employee_code}"
-            body = (
-                f"Hi {taken_by_name},\n\n"
-                f"This is a confirmation that you have taken the file related to Employee Code: {employee_code}.\n\n"
-                f"Please ensure the file is returned before {expected_return}.\n\n"
-                "Thank you,\nAdmin Team"
-            )
-            send_email(taken_by_email, subject, body)
+            # Wake the sender only once the message is committed.
+            start_outbox_worker()
+        log_action(session['username'], 'Add File Tracking', f"Added file tracking for {employee_code}", employee_code)
 
         return redirect('/employees')
-    checklist_items = prepare_checklist_status(employee[0])
     return render_template('add_file_tracking.html', employee_code=employee_code, checklist_items=checklist_items)
 
 @app.route('/delete_tracking/<int:record_id>/<string:employee_code>', methods=['POST'])
 @admin_required
 def delete_tracking(record_id, employee_code):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM file_tracking WHERE id = ?', (record_id,))
-    conn.commit()
-    conn.close()
+    with create_connection() as conn:
+        conn.execute('DELETE FROM file_tracking WHERE id = ?', (record_id,))
     log_action(session['username'], 'Delete File Tracking', f"Deleted tracking {record_id} for {employee_code}")
     return redirect(f'/view_file_tracking/{employee_code}')
 
@@ -520,27 +590,27 @@ def update_tracking(record_id, employee_code):
 @app.route('/view_checklist/<string:employee_code>')
 @login_required
 def view_checklist(employee_code):
-    employee = get_employee_by_code(employee_code)
+    employee, checklist, _ = get_employee_detail(employee_code, tracking=False)
     if not employee: return "❌ Employee not found", 404
-    return render_template('view_checklist.html', checklist=prepare_checklist_status(employee[0]),
+    return render_template('view_checklist.html', checklist=checklist,
                            employee_code=employee_code)
 
 @app.route('/view_file_tracking/<string:employee_code>')
 @login_required
 def view_file_tracking(employee_code):
-    employee = get_employee_by_code(employee_code)
+    employee, _, tracking_records = get_employee_detail(employee_code, checklist=False)
     if not employee: return "❌ Employee not found", 404
-    return render_template('view_file_tracking.html', tracking_records=get_file_tracking_by_employee(employee[0]),
+    return render_template('view_file_tracking.html', tracking_records=tracking_records,
                            employee_code=employee_code)
 
 @app.route('/employee/<string:employee_code>')
 @login_required
 def view_employee_detail(employee_code):
-    employee = get_employee_by_code(employee_code)
+    employee, checklist, tracking_records = get_employee_detail(employee_code)
     if not employee: return "❌ Employee not found", 404
     return render_template('employee_detail.html', employee=employee,
-                           checklist=prepare_checklist_status(employee[0]),
-                           tracking_records=get_file_tracking_by_employee(employee[0]))
+                           checklist=checklist,
+                           tracking_records=tracking_records)
 
 @app.route('/locker_info/<string:employee_code>')
 @login_required
@@ -554,60 +624,74 @@ def locker_info(employee_code):
 @app.route('/edit_file_tracking/<string:employee_code>', methods=['GET', 'POST'])
 @super_admin_required
 def edit_file_tracking(employee_code):
-    employee = get_employee_by_code(employee_code)
+    employee, checklist_items, tracking_records = get_employee_detail(
+        employee_code, checklist=request.method == 'GET')
     if not employee: return "❌ Employee not found", 404
-    tracking_records = get_file_tracking_by_employee(employee[0])
     if not tracking_records: return "❌ File tracking record not found", 404
     first_record = tracking_records[0]
     if request.method == 'POST':
-        conn = create_connection()
-        cursor = conn.cursor()
         documents_taken = ",".join(request.form.getlist('documents_taken'))
-        cursor.execute(
-            '''
-            UPDATE file_tracking
-            SET date_taken = ?,
-                taken_by = ?,
-                taken_by_email = ?,
-                file_taken_time = ?,
-                expected_return_date = ?,
-                documents_taken = ?,
-                status_of_documents = ?
-            WHERE id = ?
-        ''', (
-                request.form['date_taken'],
-                request.form['taken_by'],
-                request.form.get('taken_by_email'),
-                request.form['file_taken_time'],
-                request.form['expected_return_date'],
-                documents_taken,
-                request.form['status_of_documents'],
-                first_record[0]
-        ))
-        conn.commit()
-        conn.close()
+        update_file_tracking_entry(
+            first_record[0],
+            request.form['date_taken'],
+            request.form['taken_by'],
+            request.form.get('taken_by_email'),
+            request.form['file_taken_time'],
+            request.form['expected_return_date'],
+            documents_taken,
+            request.form['status_of_documents'],
+        )
         log_action(session['username'], 'Edit File Tracking', f"Edited tracking for {employee_code}", employee_code)
         return redirect(f'/employee/{employee_code}')
-    checklist_items = prepare_checklist_status(employee[0])
     return render_template('edit_file_tracking.html', record=first_record, employee=employee, checklist_items=checklist_items)
 
 @app.route('/view_logs')
 @admin_required
 def view_logs():
-    logs = []
-    try:
-        with open('logs/activity_log.csv', newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                logs.append(row)
-    except FileNotFoundError:
-        pass
-    return render_template('view_logs.html', logs=logs)
+    if request.args.get('source') == 'csv':
+        return render_template('view_logs.html', source='csv', logs=read_csv_tail(LOGS_PER_PAGE))
+
+    filters = {
+        'user': request.args.get('user', '').strip(),
+        'action': request.args.get('action', '').strip(),
+        'employee_code': request.args.get('employee_code', '').strip(),
+        'since': normalize_date(request.args.get('since', '')) or '',
+        'until': normalize_date(request.args.get('until', '')) or '',
+    }
+    after = request.args.get('after', type=int)
+    before = None if after else request.args.get('before', type=int)
+    rows = get_activity_logs(**filters, after=after, before=before, limit=LOGS_PER_PAGE + 1)
+    # As in list_employees: the extra row tells whether more pages exist.
+    if before:
+        logs = rows[1:] if len(rows) > LOGS_PER_PAGE else rows
+        has_newer, has_older = len(rows) > LOGS_PER_PAGE, True
+    else:
+        logs = rows[:LOGS_PER_PAGE]
+        has_newer, has_older = after is not None, len(rows) > LOGS_PER_PAGE
+    return render_template(
+        'view_logs.html',
+        source='db',
+        logs=logs,
+        filters=filters,
+        actions=get_activity_actions(),
+        newer_cursor=logs[0][0] if has_newer and logs else None,
+        older_cursor=logs[-1][0] if has_older and logs else None,
+    )
 
 from io import BytesIO
-import base64
 from PIL import Image, ImageOps
 
+@app.route('/sql_stats')
+@super_admin_required
+def sql_stats():
+    order = request.args.get('order', 'max')
+    if order not in ('max', 'total'):
+        order = 'max'
+    n = request.args.get('n', 20, type=int)
+    queries = slowest_queries(max(1, min(n, 200)), order)
+    return render_template('sql_stats.html', queries=queries, order=order,
+                           slow_query_ms=config.SLOW_QUERY_MS)
+
 @app.route('/upload_ocr', methods=['GET', 'POST'])
 @admin_required
 def upload_ocr():
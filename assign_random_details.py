@@ -1,6 +1,10 @@
+import argparse
 import sqlite3
 import csv
 import random
+import time
+
+from utils.entity_classifier import classify_entity
 
 COMPANY_NAMES = [
     "Aromeo Brands Private Limited",
@@ -37,6 +41,9 @@ DEPT_TO_UNITS = {
 }
 
 DB_NAME = "employee_records.db"
+EXPORT_BATCH_SIZE = 5000
+# Synthetic employee codes start here, clear of the real code ranges.
+SYNTHETIC_CODE_BASE = 9_000_000
 
 
 def ensure_company_column(conn: sqlite3.Connection) -> None:
@@ -49,37 +56,81 @@ def ensure_company_column(conn: sqlite3.Connection) -> None:
         conn.commit()
 
 
-def assign_random_details() -> None:
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+def _random_details(ids):
+    for (emp_id,) in ids:
+        department = random.choice(DEPARTMENTS)
+        yield random.choice(COMPANY_NAMES), department, random.choice(DEPT_TO_UNITS[department]), emp_id
+
+
+def _report(label: str, count: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{label} {count} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+
+def add_synthetic_employees(conn: sqlite3.Connection, count: int) -> None:
+    """Insert ``count`` placeholder employees for load testing."""
+    started = time.perf_counter()
+    first = (conn.execute("SELECT ifnull(MAX(id), 0) FROM employees").fetchone()[0]) + 1
+    rows = (
+        (str(SYNTHETIC_CODE_BASE + n), f"Synthetic Employee {n}", "Staff", "-", "-",
+         "-", "-", "-", "-", "-", "-", classify_entity(str(SYNTHETIC_CODE_BASE + n)))
+        for n in range(first, first + count)
+    )
+    with conn:
+        conn.executemany(
+            "INSERT INTO employees (employee_code, name, designation, department, unit, epf, esi, "
+            "joining_date, retirement_date, leaving_date, uan, detected_entity) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    _report("Added", count, started)
 
-    ensure_company_column(conn)
 
-    cur.execute("SELECT id FROM employees")
-    employees = cur.fetchall()
+def assign_random_details(synthetic: int = 0, output: str = "employees_updated.csv") -> None:
+    conn = sqlite3.connect(DB_NAME)
 
-    for (emp_id,) in employees:
-        company = random.choice(COMPANY_NAMES)
-        department = random.choice(DEPARTMENTS)
-        unit = random.choice(DEPT_TO_UNITS[department])
-        cur.execute(
+    ensure_company_column(conn)
+    if synthetic:
+        add_synthetic_employees(conn, synthetic)
+
+    # One transaction for the whole reassignment.  Only the ids are held in
+    # memory: reading them from a live cursor would revisit rows as the
+    # company index they are scanned through is rewritten.
+    started = time.perf_counter()
+    ids = conn.execute("SELECT id FROM employees").fetchall()
+    with conn:
+        cur = conn.executemany(
             "UPDATE employees SET company = ?, department = ?, unit = ? WHERE id = ?",
-            (company, department, unit, emp_id),
+            _random_details(ids),
         )
+    _report("Updated", cur.rowcount, started)
 
-    conn.commit()
-
-    # Export updated table to CSV
-    cur.execute("SELECT * FROM employees")
-    rows = cur.fetchall()
+    # Export updated table to CSV in batches
+    started = time.perf_counter()
+    exported = 0
+    cur = conn.execute("SELECT * FROM employees")
     headers = [desc[0] for desc in cur.description]
-    with open("employees_updated.csv", "w", newline="", encoding="utf-8") as f:
+    with open(output, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(headers)
-        writer.writerows(rows)
+        while True:
+            rows = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            exported += len(rows)
+    _report("Exported", exported, started)
 
     conn.close()
 
 
 if __name__ == "__main__":
-    assign_random_details()
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description="Assign random companies, departments and units, then export employees."
+    )
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="first add this many placeholder employees (load testing)")
+    parser.add_argument("--output", default="employees_updated.csv")
+    args = parser.parse_args()
+    assign_random_details(args.synthetic, args.output)
@@ -1,3 +1,5 @@
+import os
+
 COMPANIES = [
     "Aromee Brands Private Limited",
     "Canara Security Press Limited",
@@ -9,4 +11,59 @@ COMPANIES = [
     "QuestPro Consultancy Services Private Limited",
     "Westtek Enterprises Private Limited",
     "Zeta Cyber Solutions Private Limited",
-]
\ No newline at end of file
+]
+
+# Onboarding documents shown on every checklist, in display order
+CHECKLIST_ITEMS = [
+    "Appointment Letter", "NDA Declaration", "Passport Photo", "Employment Form",
+    "Dependent Details Form", "ESI Declaration", "EPF Declaration",
+    "Form 25 Payment of Wages", "Gratuity Nomination", "NFA (Note for Approval)",
+    "Interview Assessment", "HR Interview Assessment", "Resume with Declaration",
+    "Vaccination Certificate", "Previous Experience Certificates", "SSLC Certificate",
+    "PUC Certificate", "Graduation Certificate", "Post Graduation Certificate",
+    "PAN Card", "Aadhar Card", "Bank Account Details"
+]
+
+# SQLite connection profile, applied to every connection in utils/database.py
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KIB = int(os.environ.get("SQLITE_CACHE_SIZE_KIB", "16384"))
+SQLITE_TEMP_STORE = os.environ.get("SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", "0"))  # bytes, 0 disables mmap
+
+# SQL tracing: every statement is timed per request (Server-Timing header and
+# /sql_stats); statements slower than SLOW_QUERY_MS go to logs/slow_queries.log.
+SQL_TRACE = os.environ.get("SQL_TRACE", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+# Activity log: records are buffered and written to activity_logs in batches.
+# ACTIVITY_LOG_CSV is an optional extra sink; set it to "" to disable.
+ACTIVITY_LOG_CSV = os.environ.get("ACTIVITY_LOG_CSV", "logs/activity_log.csv")
+ACTIVITY_LOG_QUEUE_SIZE = int(os.environ.get("ACTIVITY_LOG_QUEUE_SIZE", "10000"))
+ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get("ACTIVITY_LOG_BATCH_SIZE", "200"))
+ACTIVITY_LOG_FLUSH_SECONDS = float(os.environ.get("ACTIVITY_LOG_FLUSH_SECONDS", "1.0"))
+# Rotation and retention (utils/log_archive.py); retention 0 keeps every row hot.
+ACTIVITY_LOG_ROTATE_BYTES = int(os.environ.get("ACTIVITY_LOG_ROTATE_BYTES", str(10 * 1024 * 1024)))
+ACTIVITY_LOG_RETENTION_DAYS = int(os.environ.get("ACTIVITY_LOG_RETENTION_DAYS", "0"))
+
+# Outgoing email (utils/outbox.py). Leave SMTP_USERNAME unset to skip login and
+# set SMTP_STARTTLS=0 for a local debugging server.
+SMTP_SERVER = os.environ.get("SMTP_SERVER")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_USERNAME = os.environ.get("SMTP_USERNAME")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") != "0"
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", "30"))
+EMAIL_FROM = os.environ.get("EMAIL_FROM", SMTP_USERNAME or "noreply@localhost")
+OUTBOX_WORKER = os.environ.get("OUTBOX_WORKER", "1") != "0"  # 0: run `python -m utils.outbox` instead
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_SECONDS = int(os.environ.get("OUTBOX_BACKOFF_SECONDS", "60"))
+OUTBOX_LEASE_SECONDS = int(os.environ.get("OUTBOX_LEASE_SECONDS", "600"))
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", "30"))
+
+# QR codes encode QR_BASE_URL/employee/<code>; /qr/<code>.png renders them
+# lazily into QR_CACHE_DIR.
+QR_BASE_URL = os.environ.get("QR_BASE_URL", "http://192.168.1.142:5000").rstrip("/")
+QR_CACHE_DIR = os.environ.get("QR_CACHE_DIR", "static/qr_cache")
@@ -0,0 +1,7 @@
+# Try to import numpy, used to score mask patterns faster.
+np = None
+
+try:
+    import numpy as np  # type: ignore  # noqa: F401
+except ImportError:  # pragma: no cover
+    pass
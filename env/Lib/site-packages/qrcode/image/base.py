@@ -2,6 +2,7 @@ import abc
 from typing import TYPE_CHECKING, Any, Optional, Union
 
 from qrcode.image.styles.moduledrawers.base import QRModuleDrawer
+from qrcode.matrix import ModuleMatrix
 
 if TYPE_CHECKING:
     from qrcode.main import ActiveWithNeighbors, QRCode
@@ -26,10 +27,29 @@ class BaseImage:
         self.width = width
         self.box_size = box_size
         self.pixel_size = (self.width + self.border * 2) * self.box_size
-        self.modules = kwargs.pop("qrcode_modules")
+        modules = kwargs.pop("qrcode_modules")
+        if isinstance(modules, ModuleMatrix):
+            self.matrix = modules
+            self._modules = None
+        else:
+            self.modules = modules
         self._img = self.new_image(**kwargs)
         self.init_new_image()
 
+    @property
+    def modules(self):
+        """
+        The modules as rows of booleans, built from ``matrix`` when first read.
+        """
+        if self._modules is None:
+            self._modules = self.matrix.to_list()
+        return self._modules
+
+    @modules.setter
+    def modules(self, modules):
+        self.matrix = ModuleMatrix.from_list(modules)
+        self._modules = modules
+
     @abc.abstractmethod
     def drawrect(self, row, col):
         """
@@ -158,7 +178,7 @@ class BaseImageWithDrawer(BaseImage):
         is_active: Union[bool, ActiveWithNeighbors] = (
             qr.active_with_neighbors(row, col)
             if drawer.needs_neighbors
-            else bool(qr.modules[row][col])
+            else qr.matrix.is_dark(row, col)
         )
 
         drawer.drawrect(box, is_active)
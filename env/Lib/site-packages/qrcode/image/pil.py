@@ -9,6 +9,20 @@ class PilImage(qrcode.image.base.BaseImage):
 
     kind = "PNG"
 
+    @property
+    def _rasterize(self):
+        # Subclasses that draw modules themselves still get a drawrect call
+        # per dark module; otherwise process() draws them all in one pass.
+        return type(self).drawrect is PilImage.drawrect
+
+    @property
+    def needs_drawrect(self):
+        return not self._rasterize
+
+    @property
+    def needs_processing(self):
+        return self._rasterize
+
     def new_image(self, **kwargs):
         if not Image:
             raise ImportError("PIL library not found.")
@@ -47,6 +61,35 @@ class PilImage(qrcode.image.base.BaseImage):
         box = self.pixel_box(row, col)
         self._idr.rectangle(box, fill=self.fill_color)
 
+    def process(self):
+        """
+        Draw every dark module at once: render the matrix at one pixel per
+        module, scale it up to the box size and paste it inside the border.
+        """
+        size = self.width
+        row_bytes = (size + 7) // 8
+        # Matrix rows have the first column in the lowest bit, hence the
+        # reversed raw modes. Black and white codes are pasted as they are
+        # (dark modules inverted to black); other colors are painted through
+        # the modules as a mask.
+        black_and_white = self._img.mode == "1"
+        modules = Image.frombytes(
+            "1",
+            (size, size),
+            b"".join(row.to_bytes(row_bytes, "little") for row in self.matrix.dark),
+            "raw",
+            "1;IR" if black_and_white else "1;R",
+        )
+        side = size * self.box_size
+        modules = modules.resize((side, side), Image.Resampling.NEAREST)
+        offset = self.border * self.box_size
+        if black_and_white:
+            self._img.paste(modules, (offset, offset))
+        else:
+            self._img.paste(
+                self.fill_color, (offset, offset, offset + side, offset + side), modules
+            )
+
     def save(self, stream, format=None, **kwargs):
         kind = kwargs.pop("kind", self.kind)
         if format is None:
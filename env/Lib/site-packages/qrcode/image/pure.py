@@ -32,12 +32,14 @@ class PyPNGImage(BaseImage):
     def rows_iter(self):
         yield from self.border_rows_iter()
         border_col = [1] * (self.box_size * self.border)
-        for module_row in self.modules:
+        columns = range(self.width)
+        for module_row in self.matrix.dark:
             row = (
                 border_col
                 + list(
                     chain.from_iterable(
-                        ([not point] * self.box_size) for point in module_row
+                        ([not module_row >> col & 1] * self.box_size)
+                        for col in columns
                     )
                 )
                 + border_col
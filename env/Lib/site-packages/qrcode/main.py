@@ -13,10 +13,11 @@ from typing import (
 from qrcode import constants, exceptions, util
 from qrcode.image.base import BaseImage
 from qrcode.image.pure import PyPNGImage
+from qrcode.matrix import ModuleMatrix, data_layout, rows_to_array
 
 ModulesType = list[list[Optional[bool]]]
 # Cache modules generated just based on the QR Code version
-precomputed_qr_blanks: dict[int, ModulesType] = {}
+precomputed_qr_blanks: dict[int, ModuleMatrix] = {}
 
 
 def make(data=None, **kwargs):
@@ -72,7 +73,8 @@ GenericImageLocal = TypeVar("GenericImageLocal", bound=BaseImage)
 
 
 class QRCode(Generic[GenericImage]):
-    modules: ModulesType
+    matrix: Optional[ModuleMatrix]
+    _modules: Optional[ModulesType]
     _version: Optional[int] = None
 
     def __init__(
@@ -124,11 +126,31 @@ class QRCode(Generic[GenericImage]):
         """
         Reset the internal data.
         """
-        self.modules = [[]]
+        self.matrix = None
+        self._modules = None
+        self._placed_data = None
         self.modules_count = 0
         self.data_cache = None
         self.data_list = []
 
+    @property
+    def modules(self) -> ModulesType:
+        """
+        The modules as rows of ``True`` (dark), ``False`` (light) or ``None``
+        (not placed yet), built from ``matrix`` when first read. Changing
+        these lists does not change the QR Code.
+        """
+        if self._modules is None:
+            if self.matrix is None:
+                return [[]]
+            self._modules = self.matrix.to_list()
+        return self._modules
+
+    @modules.setter
+    def modules(self, modules: ModulesType) -> None:
+        self.matrix = ModuleMatrix.from_list(modules)
+        self._modules = None
+
     def add_data(self, data, optimize=20):
         """
         Add data to this QR Code.
@@ -160,32 +182,43 @@ class QRCode(Generic[GenericImage]):
             self.makeImpl(False, self.mask_pattern)
 
     def makeImpl(self, test, mask_pattern):
+        self.setup_patterns(test, mask_pattern)
+        self.map_data(self.get_data(), mask_pattern)
+
+    def setup_patterns(self, test, mask_pattern):
+        """
+        Lay out everything but the data: finder, alignment and timing
+        patterns, and the format and version information.
+        """
         self.modules_count = self.version * 4 + 17
+        self._modules = None
 
         if self.version in precomputed_qr_blanks:
-            self.modules = copy_2d_array(precomputed_qr_blanks[self.version])
+            self.matrix = precomputed_qr_blanks[self.version].copy()
         else:
-            self.modules = [
-                [None] * self.modules_count for i in range(self.modules_count)
-            ]
+            self.matrix = ModuleMatrix(self.modules_count)
             self.setup_position_probe_pattern(0, 0)
             self.setup_position_probe_pattern(self.modules_count - 7, 0)
             self.setup_position_probe_pattern(0, self.modules_count - 7)
             self.setup_position_adjust_pattern()
             self.setup_timing_pattern()
 
-            precomputed_qr_blanks[self.version] = copy_2d_array(self.modules)
+            precomputed_qr_blanks[self.version] = self.matrix.copy()
 
         self.setup_type_info(test, mask_pattern)
 
         if self.version >= 7:
             self.setup_type_number(test)
 
+    def get_data(self):
+        """
+        Return the encoded data codewords, computing them on first use.
+        """
         if self.data_cache is None:
             self.data_cache = util.create_data(
                 self.version, self.error_correction, self.data_list
             )
-        self.map_data(self.data_cache, mask_pattern)
+        return self.data_cache
 
     def setup_position_probe_pattern(self, row, col):
         for r in range(-1, 8):
@@ -201,9 +234,9 @@ class QRCode(Generic[GenericImage]):
                     or (0 <= c <= 6 and r in {0, 6})
                     or (2 <= r <= 4 and 2 <= c <= 4)
                 ):
-                    self.modules[row + r][col + c] = True
+                    self.matrix.set(row + r, col + c, True)
                 else:
-                    self.modules[row + r][col + c] = False
+                    self.matrix.set(row + r, col + c, False)
 
     def best_fit(self, start=None):
         """
@@ -239,13 +272,16 @@ class QRCode(Generic[GenericImage]):
         """
         Find the most efficient mask pattern.
         """
+        if util.np is not None:
+            return self._best_mask_pattern_vectorized()
+
         min_lost_point = 0
         pattern = 0
 
         for i in range(8):
             self.makeImpl(True, i)
 
-            lost_point = util.lost_point(self.modules)
+            lost_point = self.matrix.lost_point()
 
             if i == 0 or min_lost_point > lost_point:
                 min_lost_point = lost_point
@@ -253,6 +289,22 @@ class QRCode(Generic[GenericImage]):
 
         return pattern
 
+    def _best_mask_pattern_vectorized(self):
+        # While testing, the format and version information is left blank,
+        # so the eight trials differ only in their masked data modules. Lay
+        # the data out once and score every masked copy together.
+        self.setup_patterns(True, 0)
+        layout, placed = self._place_data(self.get_data())
+        size = self.modules_count
+        is_data = rows_to_array(layout.free, size)
+        unmasked = rows_to_array(
+            [dark | data for dark, data in zip(self.matrix.dark, placed)], size
+        )
+        masks = util.mask_arrays(size) & is_data
+        lost_points = util.lost_points(unmasked ^ masks)
+        # The first of equal scores wins, as in the loop above.
+        return lost_points.index(min(lost_points))
+
     def print_tty(self, out=None):
         """
         Output the QR Code only using TTY colors.
@@ -370,17 +422,18 @@ class QRCode(Generic[GenericImage]):
             self.border,
             self.modules_count,
             self.box_size,
-            qrcode_modules=self.modules,
+            qrcode_modules=self.matrix,
             **kwargs,
         )
 
         if im.needs_drawrect:
-            for r in range(self.modules_count):
-                for c in range(self.modules_count):
-                    if im.needs_context:
+            if im.needs_context:
+                for r in range(self.modules_count):
+                    for c in range(self.modules_count):
                         im.drawrect_context(r, c, qr=self)
-                    elif self.modules[r][c]:
-                        im.drawrect(r, c)
+            else:
+                for r, c in self.matrix.dark_modules():
+                    im.drawrect(r, c)
         if im.needs_processing:
             im.process()
 
@@ -389,22 +442,23 @@ class QRCode(Generic[GenericImage]):
     # return true if and only if (row, col) is in the module
     def is_constrained(self, row: int, col: int) -> bool:
         return (
-            row >= 0
-            and row < len(self.modules)
+            self.matrix is not None
+            and row >= 0
+            and row < self.matrix.size
             and col >= 0
-            and col < len(self.modules[row])
+            and col < self.matrix.size
         )
 
     def setup_timing_pattern(self):
         for r in range(8, self.modules_count - 8):
-            if self.modules[r][6] is not None:
+            if self.matrix.get(r, 6) is not None:
                 continue
-            self.modules[r][6] = r % 2 == 0
+            self.matrix.set(r, 6, r % 2 == 0)
 
         for c in range(8, self.modules_count - 8):
-            if self.modules[6][c] is not None:
+            if self.matrix.get(6, c) is not None:
                 continue
-            self.modules[6][c] = c % 2 == 0
+            self.matrix.set(6, c, c % 2 == 0)
 
     def setup_position_adjust_pattern(self):
         pos = util.pattern_position(self.version)
@@ -415,7 +469,7 @@ class QRCode(Generic[GenericImage]):
             for j in range(len(pos)):
                 col = pos[j]
 
-                if self.modules[row][col] is not None:
+                if self.matrix.get(row, col) is not None:
                     continue
 
                 for r in range(-2, 3):
@@ -427,20 +481,20 @@ class QRCode(Generic[GenericImage]):
                             or c == 2
                             or (r == 0 and c == 0)
                         ):
-                            self.modules[row + r][col + c] = True
+                            self.matrix.set(row + r, col + c, True)
                         else:
-                            self.modules[row + r][col + c] = False
+                            self.matrix.set(row + r, col + c, False)
 
     def setup_type_number(self, test):
         bits = util.BCH_type_number(self.version)
 
         for i in range(18):
             mod = not test and ((bits >> i) & 1) == 1
-            self.modules[i // 3][i % 3 + self.modules_count - 8 - 3] = mod
+            self.matrix.set(i // 3, i % 3 + self.modules_count - 8 - 3, mod)
 
         for i in range(18):
             mod = not test and ((bits >> i) & 1) == 1
-            self.modules[i % 3 + self.modules_count - 8 - 3][i // 3] = mod
+            self.matrix.set(i % 3 + self.modules_count - 8 - 3, i // 3, mod)
 
     def setup_type_info(self, test, mask_pattern):
         data = (self.error_correction << 3) | mask_pattern
@@ -451,66 +505,48 @@ class QRCode(Generic[GenericImage]):
             mod = not test and ((bits >> i) & 1) == 1
 
             if i < 6:
-                self.modules[i][8] = mod
+                self.matrix.set(i, 8, mod)
             elif i < 8:
-                self.modules[i + 1][8] = mod
+                self.matrix.set(i + 1, 8, mod)
             else:
-                self.modules[self.modules_count - 15 + i][8] = mod
+                self.matrix.set(self.modules_count - 15 + i, 8, mod)
 
         # horizontal
         for i in range(15):
             mod = not test and ((bits >> i) & 1) == 1
 
             if i < 8:
-                self.modules[8][self.modules_count - i - 1] = mod
+                self.matrix.set(8, self.modules_count - i - 1, mod)
             elif i < 9:
-                self.modules[8][15 - i - 1 + 1] = mod
+                self.matrix.set(8, 15 - i - 1 + 1, mod)
             else:
-                self.modules[8][15 - i - 1] = mod
+                self.matrix.set(8, 15 - i - 1, mod)
 
         # fixed module
-        self.modules[self.modules_count - 8][8] = not test
+        self.matrix.set(self.modules_count - 8, 8, not test)
 
     def map_data(self, data, mask_pattern):
-        inc = -1
-        row = self.modules_count - 1
-        bitIndex = 7
-        byteIndex = 0
-
-        mask_func = util.mask_func(mask_pattern)
-
-        data_len = len(data)
-
-        for col in range(self.modules_count - 1, 0, -2):
-            if col <= 6:
-                col -= 1
-
-            col_range = (col, col - 1)
-
-            while True:
-                for c in col_range:
-                    if self.modules[row][c] is None:
-                        dark = False
-
-                        if byteIndex < data_len:
-                            dark = ((data[byteIndex] >> bitIndex) & 1) == 1
-
-                        if mask_func(row, c):
-                            dark = not dark
-
-                        self.modules[row][c] = dark
-                        bitIndex -= 1
-
-                        if bitIndex == -1:
-                            byteIndex += 1
-                            bitIndex = 7
-
-                row += inc
-
-                if row < 0 or self.modules_count <= row:
-                    row -= inc
-                    inc = -inc
-                    break
+        if self.matrix.has_data:
+            # Every module is placed already.
+            return
+        layout, placed = self._place_data(data)
+        self.matrix.dark = [
+            dark | (data ^ mask)
+            for dark, data, mask in zip(
+                self.matrix.dark, placed, layout.mask(mask_pattern)
+            )
+        ]
+        self.matrix.has_data = True
+        self._modules = None
+
+    def _place_data(self, data):
+        # The unmasked data rows are the same for every mask trial, so only
+        # lay them out again when the data or the layout changes.
+        layout = data_layout(self.matrix)
+        placed = self._placed_data
+        if placed is None or placed[0] is not data or placed[1] is not layout:
+            placed = self._placed_data = (data, layout, layout.place(data))
+        return layout, placed[2]
 
     def get_matrix(self):
         """
@@ -537,5 +573,5 @@ class QRCode(Generic[GenericImage]):
         context: list[bool] = []
         for r in range(row - 1, row + 2):
             for c in range(col - 1, col + 2):
-                context.append(self.is_constrained(r, c) and bool(self.modules[r][c]))
+                context.append(self.is_constrained(r, c) and self.matrix.is_dark(r, c))
         return ActiveWithNeighbors(*context)
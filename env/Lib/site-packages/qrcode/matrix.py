@@ -0,0 +1,241 @@
+"""
+Compact storage for QR Code module matrices.
+
+Each row of modules is a Python integer used as a bitset, with bit ``col``
+describing the module in column ``col``. Masking a trial then takes a few
+integer operations per row, and the penalty rules can test a whole row (or,
+across rows, every column) at once.
+"""
+
+from array import array
+from typing import Optional
+
+from qrcode import util
+from qrcode.compat.numpy import np
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # pragma: no cover (Python < 3.10)
+
+    def _popcount(bits):
+        return bin(bits).count("1")
+
+
+class ModuleMatrix:
+    """
+    A square module matrix.
+
+    Bit ``col`` of ``dark[row]`` is set for a dark module, and of
+    ``reserved[row]`` for a module placed before the data: the finder,
+    alignment and timing patterns and the format and version information.
+    Every other module holds data, and reads as ``None`` until
+    ``has_data`` is set.
+    """
+
+    __slots__ = ("size", "dark", "reserved", "has_data")
+
+    def __init__(self, size, dark=None, reserved=None, has_data=False):
+        self.size = size
+        self.dark = [0] * size if dark is None else dark
+        self.reserved = [0] * size if reserved is None else reserved
+        self.has_data = has_data
+
+    @classmethod
+    def from_list(cls, modules):
+        """
+        Build a matrix from rows of ``True``, ``False`` or ``None``. Every
+        module that is not ``None`` is treated as reserved.
+        """
+        matrix = cls(len(modules))
+        has_data = True
+        for row, modules_row in enumerate(modules):
+            dark = reserved = 0
+            for col, module in enumerate(modules_row):
+                if module is None:
+                    has_data = False
+                    continue
+                reserved |= 1 << col
+                if module:
+                    dark |= 1 << col
+            matrix.dark[row] = dark
+            matrix.reserved[row] = reserved
+        matrix.has_data = has_data
+        return matrix
+
+    def copy(self):
+        return ModuleMatrix(self.size, self.dark[:], self.reserved[:], self.has_data)
+
+    def get(self, row, col) -> Optional[bool]:
+        if not self.has_data and not self.reserved[row] >> col & 1:
+            return None
+        return bool(self.dark[row] >> col & 1)
+
+    def is_dark(self, row, col) -> bool:
+        return bool(self.dark[row] >> col & 1)
+
+    def set(self, row, col, dark):
+        """
+        Place a reserved module.
+        """
+        bit = 1 << col
+        self.reserved[row] |= bit
+        if dark:
+            self.dark[row] |= bit
+        else:
+            self.dark[row] &= ~bit
+
+    def to_list(self) -> list[list[Optional[bool]]]:
+        """
+        Return the modules as rows of ``True``, ``False`` or ``None``.
+        """
+        columns = range(self.size)
+        if self.has_data:
+            return [[bool(dark >> col & 1) for col in columns] for dark in self.dark]
+        return [
+            [bool(dark >> col & 1) if reserved >> col & 1 else None for col in columns]
+            for dark, reserved in zip(self.dark, self.reserved)
+        ]
+
+    def dark_modules(self):
+        """
+        Yield ``(row, col)`` of every dark module, row by row.
+        """
+        for row, bits in enumerate(self.dark):
+            while bits:
+                low = bits & -bits
+                yield row, low.bit_length() - 1
+                bits ^= low
+
+    def lost_point(self):
+        """
+        The mask penalty score, equal to ``util.lost_point`` of the modules.
+        """
+        size = self.size
+        rows = self.dark
+        full = (1 << size) - 1
+        lost_point = 0
+
+        # Within a row, bit ``col`` of each mask below describes the window
+        # starting at that column.
+        for row in rows:
+            same = ~(row ^ (row >> 1))
+            starts = (row ^ (row << 1)) | 1
+            lost_point += _runs((same, same >> 1, same >> 2, same >> 3), full >> 4, starts)
+            lost_point += _finder_like([row >> shift for shift in range(11)], full >> 10)
+
+        # Across rows, bit ``col`` describes that column, so every column is
+        # tested at once.
+        same_below = [~(row ^ below) & full for row, below in zip(rows, rows[1:])]
+        for i in range(size - 4):
+            starts = full if i == 0 else rows[i - 1] ^ rows[i]
+            lost_point += _runs(same_below[i : i + 4], full, starts)
+        for i in range(size - 10):
+            lost_point += _finder_like(rows[i : i + 11], full)
+
+        # 2x2 blocks of one color.
+        for row, below in zip(rows, same_below):
+            same = ~(row ^ (row >> 1))
+            lost_point += 3 * _popcount(below & (below >> 1) & same & full >> 1)
+
+        # Same arithmetic as _lost_point_level4, so the rounding matches.
+        dark_count = sum(map(_popcount, rows))
+        percent = float(dark_count) / (size**2)
+        rating = int(abs(percent * 100 - 50) / 5)
+        return lost_point + rating * 10
+
+
+def _runs(same, window, starts):
+    # ``same`` holds four masks of "this module matches the next one", so
+    # their intersection marks windows of five modules of one color. A run
+    # of length n >= 5 contains n - 4 such windows, one of them at its
+    # start, which adds up to the n - 2 points of _lost_point_level1.
+    uniform = same[0] & same[1] & same[2] & same[3] & window
+    return _popcount(uniform) + 2 * _popcount(uniform & starts)
+
+
+def _finder_like(lines, window):
+    # ``lines`` holds the 11 modules of each window, the 1:1:3:1:1 patterns
+    # of _lost_point_level3 being 10111010000 and 00001011101.
+    common = ~lines[1] & lines[4] & ~lines[5] & lines[6] & ~lines[9] & window
+    first = lines[0] & lines[2] & lines[3] & ~lines[7] & ~lines[8] & ~lines[10]
+    second = ~lines[0] & ~lines[2] & ~lines[3] & lines[7] & lines[8] & lines[10]
+    return 40 * _popcount(common & (first | second))
+
+
+class DataLayout:
+    """
+    Where the data bits go in matrices with a given set of reserved modules.
+    """
+
+    def __init__(self, size, reserved):
+        self.size = size
+        full = (1 << size) - 1
+        self.free = [~bits & full for bits in reserved]
+        # Module indices (row * size + col) in the order the data fills
+        # them: two-column strips, right to left, alternately upwards and
+        # downwards, skipping the vertical timing pattern.
+        self.positions = array("I")
+        upwards = True
+        for col in range(size - 1, 0, -2):
+            if col <= 6:
+                col -= 1
+            for row in range(size - 1, -1, -1) if upwards else range(size):
+                for c in (col, col - 1):
+                    if self.free[row] >> c & 1:
+                        self.positions.append(row * size + c)
+            upwards = not upwards
+        self._masks: dict[int, list[int]] = {}
+
+    def mask(self, pattern):
+        """
+        The rows of the given mask pattern, limited to the data modules.
+        """
+        rows = self._masks.get(pattern)
+        if rows is None:
+            mask_func = util.mask_func(pattern)
+            columns = range(self.size)
+            rows = self._masks[pattern] = [
+                sum(1 << col for col in columns if mask_func(row, col)) & free
+                for row, free in enumerate(self.free)
+            ]
+        return rows
+
+    def place(self, data):
+        """
+        Return the rows of unmasked data bits; modules beyond the data are
+        left light.
+        """
+        size = self.size
+        rows = [0] * size
+        bits = "".join(f"{byte:08b}" for byte in data)
+        for position, bit in zip(self.positions, bits):
+            if bit == "1":
+                row, col = divmod(position, size)
+                rows[row] |= 1 << col
+        return rows
+
+
+# Data layouts, keyed by the reserved rows.
+_data_layouts: dict[tuple[int, ...], DataLayout] = {}
+
+
+def data_layout(matrix):
+    key = tuple(matrix.reserved)
+    layout = _data_layouts.get(key)
+    if layout is None:
+        layout = _data_layouts[key] = DataLayout(matrix.size, matrix.reserved)
+    return layout
+
+
+def rows_to_array(rows, size):
+    """
+    Unpack row bitsets into a ``(len(rows), size)`` boolean NumPy array.
+    """
+    row_bytes = (size + 7) // 8
+    packed = b"".join(row.to_bytes(row_bytes, "little") for row in rows)
+    bits = np.unpackbits(
+        np.frombuffer(packed, dtype=np.uint8).reshape(len(rows), row_bytes),
+        axis=1,
+        bitorder="little",
+    )
+    return bits[:, :size].astype(bool)
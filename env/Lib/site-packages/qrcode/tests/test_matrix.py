@@ -0,0 +1,54 @@
+import random
+
+import qrcode
+from qrcode import util
+from qrcode.matrix import ModuleMatrix
+
+
+def random_modules(size, ratio, seed):
+    rng = random.Random(seed)
+    return [[rng.random() < ratio for _ in range(size)] for _ in range(size)]
+
+
+def test_lost_point_matches_util():
+    for size in (21, 45, 57):
+        for ratio in (0.2, 0.5, 0.8):
+            modules = random_modules(size, ratio, seed=size)
+            matrix = ModuleMatrix.from_list(modules)
+            assert matrix.lost_point() == util.lost_point(modules)
+
+
+def test_list_round_trip():
+    modules = random_modules(21, 0.5, seed=1)
+    modules[3][4] = None
+    matrix = ModuleMatrix.from_list(modules)
+    assert not matrix.has_data
+    assert matrix.get(3, 4) is None
+    assert matrix.to_list() == modules
+
+
+def test_dark_modules():
+    modules = random_modules(25, 0.5, seed=2)
+    matrix = ModuleMatrix.from_list(modules)
+    expected = [(r, c) for r in range(25) for c in range(25) if modules[r][c]]
+    assert list(matrix.dark_modules()) == expected
+
+
+def test_modules_view():
+    qr = qrcode.QRCode()
+    assert qr.modules == [[]]
+    qr.add_data("a")
+    qr.make()
+    assert qr.modules == qr.matrix.to_list()
+    assert qr.modules is qr.modules
+    qr.make()
+    assert qr.modules == qr.matrix.to_list()
+
+
+def test_set_modules():
+    qr = qrcode.QRCode(border=0)
+    qr.add_data("a")
+    qr.make()
+    modules = qr.modules
+    qr.modules = [[not module for module in row] for row in modules]
+    assert qr.get_matrix() == [[not module for module in row] for row in modules]
@@ -73,6 +73,17 @@ def test_mode_alpha():
     assert qr.data_list[0].mode == MODE_ALPHA_NUM
 
 
+def test_best_mask_pattern_without_numpy():
+    pytest.importorskip("numpy", reason="numpy is not installed")
+    for version in (1, 7, 20):
+        qr = qrcode.QRCode(version=version)
+        qr.add_data("x" * version * 5)
+        qr.make(fit=False)
+        with mock.patch("qrcode.util.np", None):
+            expected = qr.best_mask_pattern()
+        assert qr.best_mask_pattern() == expected
+
+
 def test_regression_mode_comma():
     qr = qrcode.QRCode()
     qr.add_data(",", optimize=0)
@@ -9,6 +9,7 @@ from qrcode.tests.consts import BLACK, RED, UNICODE_TEXT, WHITE
 Image = pytest.importorskip("PIL.Image", reason="PIL is not installed")
 
 if Image:
+    from qrcode.image.pil import PilImage
     from qrcode.image.styledpil import StyledPilImage
     from qrcode.image.styles import colormasks, moduledrawers
 
@@ -29,6 +30,43 @@ def test_render_pil_background(back_color):
     img.save(io.BytesIO())
 
 
+@pytest.mark.parametrize(
+    "fill_color, back_color",
+    [("black", "white"), ("red", "white"), ("black", "transparent"), (RED, WHITE)],
+)
+@pytest.mark.parametrize("box_size, border", [(1, 0), (3, 4), (10, 2)])
+def test_render_pil_matches_drawrect(fill_color, back_color, box_size, border):
+    qr = qrcode.QRCode(box_size=box_size, border=border)
+    qr.add_data(UNICODE_TEXT)
+    img = qr.make_image(fill_color=fill_color, back_color=back_color)
+    expected = PilImage(
+        border,
+        qr.modules_count,
+        box_size,
+        qrcode_modules=qr.modules,
+        fill_color=fill_color,
+        back_color=back_color,
+    )
+    for r, c in qr.matrix.dark_modules():
+        expected.drawrect(r, c)
+    assert img.get_image().tobytes() == expected.get_image().tobytes()
+
+
+def test_render_pil_subclass_drawrect():
+    class CountingImage(PilImage):
+        calls = 0
+
+        def drawrect(self, row, col):
+            CountingImage.calls += 1
+            super().drawrect(row, col)
+
+    qr = qrcode.QRCode()
+    qr.add_data(UNICODE_TEXT)
+    img = qr.make_image(image_factory=CountingImage)
+    assert CountingImage.calls == len(list(qr.matrix.dark_modules()))
+    assert img.get_image().tobytes() == qr.make_image().get_image().tobytes()
+
+
 def test_render_pil_with_rgb_color_tuples():
     qr = qrcode.QRCode()
     qr.add_data(UNICODE_TEXT)
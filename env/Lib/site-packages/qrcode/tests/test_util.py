@@ -9,3 +9,24 @@ def test_check_wrong_version():
 
     with pytest.raises(ValueError):
         util.check_version(41)
+
+
+def test_mask_arrays():
+    np = pytest.importorskip("numpy", reason="numpy is not installed")
+    masks = util.mask_arrays(25)
+    for pattern in range(8):
+        func = util.mask_func(pattern)
+        expected = [[func(i, j) for j in range(25)] for i in range(25)]
+        assert np.array_equal(masks[pattern], expected)
+
+
+def test_lost_points_matches_lost_point():
+    np = pytest.importorskip("numpy", reason="numpy is not installed")
+    rng = np.random.default_rng(0)
+    for modules_count in (21, 57):
+        # Sparse, dense and balanced matrices exercise every penalty rule.
+        matrices = np.concatenate(
+            [rng.random((4, modules_count, modules_count)) < p for p in (0.2, 0.5, 0.8)]
+        )
+        expected = [util.lost_point(matrix.tolist()) for matrix in matrices]
+        assert util.lost_points(matrices) == expected
@@ -3,6 +3,7 @@ import re
 
 from qrcode import LUT, base, exceptions
 from qrcode.base import RSBlock
+from qrcode.compat.numpy import np
 
 # QR encoding modes.
 MODE_NUMBER = 1 << 0
@@ -351,6 +352,101 @@ def _lost_point_level4(modules, modules_count):
     return rating * 10
 
 
+# Mask patterns as NumPy arrays, cached by modules count.
+_mask_arrays: dict = {}
+
+# The 1:1:3:1:1 patterns of _lost_point_level3 as 11-bit integers.
+_FINDER_LIKE = (0b10111010000, 0b00001011101)
+
+
+def mask_arrays(modules_count):
+    """
+    Return all eight mask patterns as a boolean NumPy array of shape
+    ``(8, modules_count, modules_count)``, matching ``mask_func``.
+    """
+    masks = _mask_arrays.get(modules_count)
+    if masks is None:
+        i, j = np.indices((modules_count, modules_count))
+        masks = np.stack(
+            [
+                (i + j) % 2 == 0,
+                i % 2 == 0,
+                j % 3 == 0,
+                (i + j) % 3 == 0,
+                (i // 2 + j // 3) % 2 == 0,
+                (i * j) % 2 + (i * j) % 3 == 0,
+                ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+                ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+            ]
+        )
+        masks.setflags(write=False)
+        _mask_arrays[modules_count] = masks
+    return masks
+
+
+def lost_points(matrices):
+    """
+    Score a stack of module matrices at once.
+
+    ``matrices`` is a boolean NumPy array of shape ``(count, n, n)``; the
+    result is a list with the ``lost_point`` of each matrix.
+    """
+    count, modules_count, _ = matrices.shape
+    # Columns are scored as the rows of the transposed matrices.
+    columns = matrices.transpose(0, 2, 1)
+
+    points = _lost_points_runs(matrices) + _lost_points_runs(columns)
+    points += _lost_points_blocks(matrices)
+    points += _lost_points_finder_like(matrices) + _lost_points_finder_like(columns)
+
+    # Level 4 in plain Python, so the float rounding matches _lost_point_level4.
+    dark_counts = matrices.sum(axis=(1, 2)).tolist()
+    return [
+        int(point)
+        + int(abs(float(dark_count) / (modules_count**2) * 100 - 50) / 5) * 10
+        for point, dark_count in zip(points.tolist(), dark_counts)
+    ]
+
+
+def _lost_points_runs(lines):
+    # Level 1: runs of five or more same-colored modules along each line.
+    count, line_count, line_length = lines.shape
+    # Mark where each run starts, plus the end of every line.
+    edges = np.ones((count, line_count, line_length + 1), dtype=bool)
+    np.not_equal(lines[:, :, 1:], lines[:, :, :-1], out=edges[:, :, 1:-1])
+    starts = np.flatnonzero(edges)
+    # The step from a line's end to the next line's start is a "run" of
+    # length one, which never scores.
+    lengths = np.diff(starts)
+    scoring = lengths >= 5
+    owners = starts[:-1][scoring] // (line_count * (line_length + 1))
+    points = np.bincount(owners, weights=lengths[scoring] - 2, minlength=count)
+    return points.astype(np.int64)
+
+
+def _lost_points_blocks(matrices):
+    # Level 2: 2x2 blocks of the same color.
+    top_left = matrices[:, :-1, :-1]
+    same = (
+        (top_left == matrices[:, :-1, 1:])
+        & (top_left == matrices[:, 1:, :-1])
+        & (top_left == matrices[:, 1:, 1:])
+    )
+    return same.sum(axis=(1, 2), dtype=np.int64) * 3
+
+
+def _lost_points_finder_like(lines):
+    # Level 3: read every 11-module window as an integer, most significant
+    # bit first, and compare it with both finder-like patterns.
+    width = lines.shape[2] - 10
+    windows = np.zeros(lines.shape[:2] + (width,), dtype=np.uint16)
+    for offset in range(11):
+        windows <<= 1
+        windows |= lines[:, :, offset : offset + width]
+    hits = (windows == _FINDER_LIKE[0]) | (windows == _FINDER_LIKE[1])
+    return hits.sum(axis=(1, 2), dtype=np.int64) * 40
+
+
 def optimal_data_chunks(data, minimum=4):
     """
     An iterator returning QRData chunks optimized to the data content.
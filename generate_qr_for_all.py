@@ -1,17 +1,105 @@
-from utils.database import create_connection
-from app import generate_qr  # Make sure generate_qr uses next=/employee/ pattern
+"""Regenerate static/qr_codes/<code>.png for every employee.
+
+    python generate_qr_for_all.py [--workers N] [--force] [--prune]
+
+Large batches are rendered across a process pool (one process per CPU by
+default); small batches, and single-CPU hosts, render in-process, where the
+pool's start-up cost would outweigh the gain.
+``static/qr_codes/manifest.json`` maps each code to the hash of its payload
+URL and render settings (see ``utils.qr_generator.qr_cache_key``), so only
+new codes, codes whose image would change (e.g. after ``QR_BASE_URL``
+changes) and codes whose file went missing are rendered again.  Files are
+written atomically.  ``--prune`` deletes images of codes no longer in the
+database.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.qr_generator import STATIC_QR_DIR, generate_qr, qr_cache_key
+
+MANIFEST = os.path.join(STATIC_QR_DIR, 'manifest.json')
+# Below this many codes a process pool costs more than it saves.
+PARALLEL_MIN_CODES = 500
+
+
+def _load_manifest():
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
 
-def generate_qr_for_all_employees():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT employee_code FROM employees')
-    employees = cursor.fetchall()
 
-    for emp in employees:
-        generate_qr(emp[0])  # ✅ This will generate QR with login?next=/employee/<code>
-        print(f"✅ QR generated for {emp[0]}")
+def _save_manifest(manifest):
+    tmp = MANIFEST + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    os.replace(tmp, MANIFEST)
 
+
+def generate_qr_for_all_employees(workers=None, force=False, prune=False):
+    # Imported here rather than at the top: pool workers import this module
+    # again (on spawn), and should only load the QR helpers, not Flask.
+    from utils.database import create_connection
+
+    conn = create_connection()
+    # Codes end up in file names, so skip any that cannot be one.
+    codes = [
+        code for (code,) in conn.execute('SELECT employee_code FROM employees')
+        if code and os.sep not in code and '/' not in code and code not in ('.', '..')
+    ]
     conn.close()
 
+    os.makedirs(STATIC_QR_DIR, exist_ok=True)
+    manifest = _load_manifest()
+    stale = [
+        code for code in codes
+        if force
+        or manifest.get(code) != qr_cache_key(code)
+        or not os.path.exists(os.path.join(STATIC_QR_DIR, f'{code}.png'))
+    ]
+    print(f"{len(codes)} employees, {len(codes) - len(stale)} QR codes up to date, "
+          f"{len(stale)} to render")
+
+    started = time.perf_counter()
+    try:
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(stale) < PARALLEL_MIN_CODES:
+            for code in stale:
+                manifest[code] = generate_qr(code)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(stale) // (workers * 4))
+                for code, key in zip(stale, pool.map(generate_qr, stale, chunksize=chunksize)):
+                    manifest[code] = key
+    finally:
+        # Record whatever finished, so an interrupted run resumes where it stopped.
+        current = set(codes)
+        removed = [code for code in manifest if code not in current]
+        for code in removed:
+            del manifest[code]
+            if prune:
+                try:
+                    os.remove(os.path.join(STATIC_QR_DIR, f'{code}.png'))
+                except FileNotFoundError:
+                    pass
+        _save_manifest(manifest)
+
+    elapsed = time.perf_counter() - started
+    rate = len(stale) / elapsed if elapsed else 0
+    print(f"Rendered {len(stale)} QR codes in {elapsed:.2f}s ({rate:.0f}/s)")
+    if removed:
+        print(f"{'Deleted' if prune else 'Forgot'} {len(removed)} codes no longer in the database")
+
+
 if __name__ == '__main__':
-    generate_qr_for_all_employees()
+    parser = argparse.ArgumentParser(description="Render QR code images for all employees.")
+    parser.add_argument('--workers', type=int, help="processes to use (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="re-render every code")
+    parser.add_argument('--prune', action='store_true',
+                        help="delete images of codes that are no longer in the database")
+    args = parser.parse_args()
+    generate_qr_for_all_employees(args.workers, args.force, args.prune)
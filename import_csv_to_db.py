@@ -1,43 +1,134 @@
+"""Import file-tracking movements from a CSV export.
+
+    python import_csv_to_db.py records2.csv [--chunk-size 5000] [--dry-run]
+                               [--rejects rejected.csv] [--start-line N]
+
+Employee codes are resolved through a code-to-id map loaded once, and rows
+are inserted with ``executemany`` in one transaction per chunk.  After each
+chunk the script prints the last committed CSV line, so an interrupted
+backfill can be resumed with ``--start-line`` (the next line to read).
+"""
+import argparse
 import csv
-from utils.database import create_connection
+import time
+
+from utils.database import create_connection, tracking_date_columns
+
+CSV_FIELDS = (
+    "employee_id", "date_taken", "taken_by", "file_taken_time", "documents_taken",
+    "status_of_documents", "taken_by_email", "expected_return_date",
+)
+# NOT NULL in file_tracking; taken_by_email and expected_return_date may be blank.
+REQUIRED_FIELDS = (
+    "date_taken", "taken_by", "file_taken_time", "documents_taken", "status_of_documents",
+)
+DEFAULT_CHUNK_SIZE = 5000
+
+_INSERT = """
+    INSERT INTO file_tracking (
+        employee_id, date_taken, taken_by, file_taken_time,
+        documents_taken, status_of_documents, taken_by_email, expected_return_date,
+        date_taken_iso, expected_return_date_iso
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 
-def import_file_tracking_from_csv(csv_file):
+def _row_error(row, dates):
+    """Why ``row`` cannot be imported, or None; ``dates`` are its ISO date columns."""
+    missing = [c for c in REQUIRED_FIELDS if not (row[c] or '').strip()]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    date_taken_iso, expected_return_iso = dates
+    if date_taken_iso is None:
+        return f"unparseable date_taken {row['date_taken']!r}"
+    if (row['expected_return_date'] or '').strip() and expected_return_iso is None:
+        return f"unparseable expected_return_date {row['expected_return_date']!r}"
+    return None
+
+
+def import_file_tracking_from_csv(csv_file, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False,
+                                  rejects_file=None, start_line=2):
+    """Import ``csv_file`` and return ``(inserted, rejected)`` counts.
+
+    ``start_line`` is a physical CSV line number (line 1 is the header);
+    rows that start before it are skipped.  Rejected rows are written to
+    ``rejects_file`` with the original columns plus ``line`` and ``reason``:
+    an unknown employee code, a blank required field or an unparseable
+    date.  With ``dry_run`` every row is validated but nothing is written.
+    """
     conn = create_connection()
-    cursor = conn.cursor()
+    employee_ids = dict(conn.execute("SELECT employee_code, id FROM employees"))
+    inserted = rejected = 0
+    chunk = []
+    last_line = start_line - 1
 
-    with open(csv_file, newline='', encoding='utf-8') as f:
+    def flush():
+        if dry_run:
+            print(f"  validated through line {last_line} ({inserted} rows)")
+        else:
+            with conn:
+                conn.executemany(_INSERT, chunk)
+            print(f"  committed through line {last_line} ({inserted} rows)")
+        chunk.clear()
+
+    rejects = None
+    with open(csv_file, newline='', encoding='utf-8-sig') as f:
         reader = csv.DictReader(f)
-        for row in reader:
-            emp_code = row['employee_id']  # ✅ match your new header
-            date_taken = row['date_taken']
-            taken_by = row['taken_by']
-            file_taken_time = row['file_taken_time']
-            documents_taken = row['documents_taken']
-            status_of_documents = row['status_of_documents']
-            taken_by_email = row['taken_by_email']
-            expected_return_date = row['expected_return_date']
-
-            # ✅ Check if employee exists
-            cursor.execute('SELECT id FROM employees WHERE employee_code = ?', (emp_code,))
-            employee = cursor.fetchone()
-
-            if employee:
-                employee_id = employee[0]
-                # ✅ Insert file tracking entry
-                cursor.execute('''
-                    INSERT INTO file_tracking (
-                        employee_id, date_taken, taken_by, file_taken_time, 
-                        documents_taken, status_of_documents, taken_by_email, expected_return_date
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    employee_id, date_taken, taken_by, file_taken_time,
-                    documents_taken, status_of_documents, taken_by_email, expected_return_date
-                ))
-            else:
-                print(f"❗ Employee with code {emp_code} not found. Skipping entry.")
-
-    conn.commit()
-    conn.close()
+        missing = [c for c in CSV_FIELDS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+        if rejects_file:
+            rejects = open(rejects_file, 'w', newline='', encoding='utf-8')
+            writer = csv.DictWriter(rejects, [*reader.fieldnames, 'line', 'reason'])
+            writer.writeheader()
+        try:
+            line_no = reader.line_num + 1
+            for row in reader:
+                # line_num is where the row ended; keep the line it started on.
+                row_line, line_no = line_no, reader.line_num + 1
+                if row_line < start_line:
+                    continue
+                employee_id = employee_ids.get((row['employee_id'] or '').strip())
+                dates = tracking_date_columns(row['date_taken'], row['expected_return_date'])
+                if employee_id is None:
+                    reason = 'unknown employee code'
+                else:
+                    reason = _row_error(row, dates)
+                if reason:
+                    rejected += 1
+                    if rejects:
+                        # Surplus cells of an over-long row sit under the key None.
+                        fields = {k: v for k, v in row.items() if k is not None}
+                        writer.writerow({**fields, 'line': row_line, 'reason': reason})
+                    continue
+                values = [row[c] for c in CSV_FIELDS[1:]]
+                chunk.append((employee_id, *values, *dates))
+                inserted += 1
+                last_line = reader.line_num
+                if len(chunk) >= chunk_size:
+                    flush()
+            if chunk:
+                flush()
+        finally:
+            if rejects:
+                rejects.close()
+    return inserted, rejected
+
 
 if __name__ == '__main__':
-    import_file_tracking_from_csv('records2.csv')
+    parser = argparse.ArgumentParser(description="Import file tracking records from a CSV file.")
+    parser.add_argument('csv_file', nargs='?', default='records2.csv')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help="validate without writing")
+    parser.add_argument('--rejects', help="write rejected rows to this CSV file")
+    parser.add_argument('--start-line', type=int, default=2,
+                        help="resume from this CSV line (line 1 is the header)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    inserted, rejected = import_file_tracking_from_csv(
+        args.csv_file, args.chunk_size, args.dry_run, args.rejects, args.start_line
+    )
+    elapsed = time.perf_counter() - started
+    verb = "Would insert" if args.dry_run else "Inserted"
+    print(f"{verb} {inserted} rows, rejected {rejected}, in {elapsed:.2f}s")
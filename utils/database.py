@@ -1,163 +1,212 @@
+import os
+import queue
 import sqlite3
 import hashlib
+from pathlib import Path
+
+from flask import g, has_app_context
+
+import config
+from utils.dates import normalize_date
+from utils.sql_trace import TracingConnection
 
 DB_NAME = "employee_records.db"
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+READ_POOL_SIZE = int(os.environ.get("DB_READ_POOL_SIZE", str(POOL_SIZE)))
+# Optional copy of the database for reporting queries, refreshed with
+# ``python -m utils.snapshot``; unset, reports read the live database.
+SNAPSHOT_DB_NAME = os.environ.get("DB_SNAPSHOT_PATH", "")
+
+# Pragmas applied to every new connection, in order.
+CONNECTION_PROFILE = (
+    ("journal_mode", config.SQLITE_JOURNAL_MODE),
+    ("busy_timeout", config.SQLITE_BUSY_TIMEOUT_MS),
+    ("synchronous", config.SQLITE_SYNCHRONOUS),
+    ("cache_size", -config.SQLITE_CACHE_SIZE_KIB),
+    ("temp_store", config.SQLITE_TEMP_STORE),
+    ("mmap_size", config.SQLITE_MMAP_SIZE),
+)
+# Read-only connections cannot change the journal mode and refuse writes.
+READ_ONLY_PROFILE = tuple(
+    (name, value) for name, value in CONNECTION_PROFILE if name != "journal_mode"
+) + (("query_only", 1),)
+
+
+def apply_connection_profile(conn, profile=CONNECTION_PROFILE):
+    # executescript is not traced, so setup pragmas stay out of the SQL stats.
+    conn.executescript("".join(f"PRAGMA {name} = {value};" for name, value in profile))
+    return conn
+
+
+def check_connection_profile():
+    """Return the pragma values actually in effect on a fresh connection.
+
+    SQLite silently keeps the old journal mode when WAL is unavailable
+    (e.g. on a network share), so callers should compare against the
+    requested profile rather than assume it took.
+    """
+    conn = _pool.connect()
+    try:
+        return {
+            name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+            for name, _ in CONNECTION_PROFILE
+        }
+    finally:
+        conn.close()
+
+
+class ConnectionPool:
+    """Small per-process pool of SQLite connections.
+
+    Idle connections are kept up to ``size``; extra connections opened under
+    load are closed when released.  The pool is rebuilt after a fork so
+    gunicorn workers never share the master's handles.  A ``read_only`` pool
+    opens the file with ``mode=ro`` and sets ``query_only``.
+    """
+
+    def __init__(self, db_name, size=POOL_SIZE, read_only=False):
+        self.db_name = db_name
+        self.size = size
+        self.read_only = read_only
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def connect(self):
+        factory = TracingConnection if config.SQL_TRACE else sqlite3.Connection
+        if self.read_only:
+            conn = sqlite3.connect(
+                f"{Path(self.db_name).resolve().as_uri()}?mode=ro",
+                uri=True,
+                timeout=config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                check_same_thread=False,
+                factory=factory,
+            )
+            return apply_connection_profile(conn, READ_ONLY_PROFILE)
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            factory=factory,
+        )
+        return apply_connection_profile(conn)
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue(maxsize=self.size)
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool = ConnectionPool(DB_NAME)
+_read_pool = ConnectionPool(DB_NAME, READ_POOL_SIZE, read_only=True)
+_report_pool = ConnectionPool(SNAPSHOT_DB_NAME, READ_POOL_SIZE, read_only=True)
+
+# Request-scoped connections: ``g`` attribute name and the pool it comes from.
+_REQUEST_POOLS = {
+    "db_conn": lambda: _pool,
+    "db_read_conn": lambda: _read_pool,
+    "db_report_conn": lambda: _report_pool,
+}
+
+
+def _request_connection(name):
+    pool = _REQUEST_POOLS[name]()
+    if has_app_context():
+        if name not in g:
+            setattr(g, name, pool.acquire())
+        return getattr(g, name)
+    return pool.connect()
+
 
 def create_connection():
-    return sqlite3.connect(DB_NAME)
+    """Return the current request's connection, or a new one outside Flask.
 
-# ------------------ Table Creation ------------------ #
-def create_employee_table():
-    with create_connection() as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS employees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_code TEXT NOT NULL,
-                name TEXT NOT NULL,
-                designation TEXT NOT NULL,
-                department TEXT NOT NULL,
-                unit TEXT NOT NULL,
-                epf TEXT NOT NULL,
-                esi TEXT NOT NULL,
-                joining_date TEXT NOT NULL,
-                retirement_date TEXT NOT NULL,
-                leaving_date TEXT NOT NULL,
-                uan TEXT NOT NULL,
-                detected_entity TEXT NOT NULL
-            );
-        """)
-
-def create_checklist_table():
-    """Create checklist table and ensure new file columns exist."""
-    with create_connection() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS checklist (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_id INTEGER NOT NULL,
-                document_name TEXT NOT NULL,
-                is_submitted TEXT NOT NULL,
-                verified_by TEXT,
-                reviewed_by TEXT,
-                verified_date TEXT,
-                file_path TEXT,
-                uploaded_by TEXT,
-                upload_date TEXT,
-                FOREIGN KEY (employee_id) REFERENCES employees(id)
-            );
-            """
-        )
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(checklist)")
-        cols = [c[1] for c in cur.fetchall()]
-        if 'file_path' not in cols:
-            cur.execute("ALTER TABLE checklist ADD COLUMN file_path TEXT")
-        if 'uploaded_by' not in cols:
-            cur.execute("ALTER TABLE checklist ADD COLUMN uploaded_by TEXT")
-        if 'upload_date' not in cols:
-            cur.execute("ALTER TABLE checklist ADD COLUMN upload_date TEXT")
-
-def create_file_tracking_table():
-    """Create file_tracking table and add optional columns if needed."""
-    with create_connection() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS file_tracking (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_id INTEGER NOT NULL,
-                date_taken TEXT NOT NULL,
-                taken_by TEXT NOT NULL,
-                taken_by_email TEXT,
-                file_taken_time TEXT NOT NULL,
-                expected_return_date TEXT,
-                documents_taken TEXT NOT NULL,
-                status_of_documents TEXT NOT NULL,
-                FOREIGN KEY (employee_id) REFERENCES employees(id)
-            );
-            """
-        )
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(file_tracking)")
-        cols = [c[1] for c in cur.fetchall()]
-        if "taken_by_email" not in cols:
-            cur.execute("ALTER TABLE file_tracking ADD COLUMN taken_by_email TEXT")
-        if "expected_return_date" not in cols:
-            cur.execute(
-                "ALTER TABLE file_tracking ADD COLUMN expected_return_date TEXT"
-            )
+    Inside an app context the connection is borrowed from the pool once and
+    shared by every helper until teardown, so callers must not close it.
+    """
+    return _request_connection("db_conn")
 
-def create_users_table():
-    with create_connection() as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL,
-                full_name TEXT,
-                company TEXT,
-                mobile_number TEXT,
-                email TEXT,
-                profile_photo TEXT
-            );
-        """)
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(users)")
-        cols = [c[1] for c in cur.fetchall()]
-        optional_cols = ['full_name', 'company', 'mobile_number', 'email', 'profile_photo']
-        for col in optional_cols:
-            if col not in cols:
-                conn.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT")
-        cur.execute("SELECT COUNT(*) FROM users WHERE role = 'super_admin'")
-        if cur.fetchone()[0] == 0:
-            password_hash = hashlib.sha256('SuperAdmin123'.encode()).hexdigest()
-            cur.execute(
-                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                ('superadmin', password_hash, 'super_admin')
-            )
-            conn.commit()
 
-def create_user_companies_table():
-    with create_connection() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS user_companies (
-                user_id INTEGER NOT NULL,
-                company TEXT NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            );
-            """
-        )
+def read_connection():
+    """Like :func:`create_connection`, but read-only and from its own pool.
 
-def create_activity_logs_table():
-    with create_connection() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS activity_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                action_type TEXT NOT NULL,
-                target_name TEXT,
-                employee_code TEXT,
-                performed_by TEXT NOT NULL,
-                timestamp TEXT NOT NULL
-            );
-            """
-        )
+    In WAL mode readers never wait on the writer, so read helpers use this
+    and the write pool stays free for inserts and updates.
+    """
+    return _request_connection("db_read_conn")
+
+
+def report_connection():
+    """Read-only connection to the reporting snapshot, if one is configured.
+
+    Falls back to :func:`read_connection` when ``DB_SNAPSHOT_PATH`` is unset
+    or the snapshot has not been created yet.
+    """
+    if not SNAPSHOT_DB_NAME or not os.path.exists(_report_pool.db_name):
+        return read_connection()
+    return _request_connection("db_report_conn")
+
+
+def own_connection():
+    """A new write connection, never the request's; the caller closes it.
+
+    For writes that must not commit whatever the current request has open.
+    """
+    return _pool.connect()
+
+
+def close_request_connection(exc=None):
+    """Return the request-scoped connections to their pools."""
+    for name, pool in _REQUEST_POOLS.items():
+        conn = g.pop(name, None)
+        if conn is not None:
+            pool().release(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(close_request_connection)
 
 # ------------------ Insert Data ------------------ #
+def employee_date_columns(data):
+    """ISO forms of joining, retirement and leaving dates from an employee row."""
+    return tuple(normalize_date(value) for value in data[7:10])
+
+
 def insert_employee(data):
     with create_connection() as conn:
         conn.execute("""
             INSERT INTO employees (
                 employee_code, name, designation, department, unit,
-                epf, esi, joining_date, retirement_date, leaving_date, uan, detected_entity
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """, data)
+                epf, esi, joining_date, retirement_date, leaving_date, uan, detected_entity,
+                joining_date_iso, retirement_date_iso, leaving_date_iso
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """, (*data, *employee_date_columns(data)))
 
-def insert_checklist_entry(data):
-    """Insert a checklist record including optional file info."""
+def insert_checklist_entries(rows):
+    """Insert several checklist records in one transaction.
+
+    Either every row is written or, if any insert fails, none are.
+    """
     with create_connection() as conn:
-        conn.execute(
+        conn.executemany(
             """
             INSERT INTO checklist (
                 employee_id,
@@ -171,110 +220,262 @@ def insert_checklist_entry(data):
                 upload_date
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
             """,
-            data,
+            rows,
         )
 
-def insert_file_tracking_entry(data):
-    """Insert a file tracking record including optional email and return date."""
-    with create_connection() as conn:
-        conn.execute(
-            """
-            INSERT INTO file_tracking (
-                employee_id,
-                date_taken,
-                taken_by,
-                taken_by_email,
-               file_taken_time,
-                expected_return_date,
-                documents_taken,
-                status_of_documents
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
-            """,
-            data,
-        )
+def tracking_date_columns(date_taken, expected_return_date):
+    """ISO forms of a tracking record's dates; imported return dates are day-first."""
+    return (
+        normalize_date(date_taken),
+        normalize_date(expected_return_date, day_first=True),
+    )
+
+
+_INSERT_FILE_TRACKING = """
+    INSERT INTO file_tracking (
+        employee_id,
+        date_taken,
+        taken_by,
+        taken_by_email,
+        file_taken_time,
+        expected_return_date,
+        documents_taken,
+        status_of_documents,
+        date_taken_iso,
+        expected_return_date_iso
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+
+def insert_file_tracking_entry(data, conn=None):
+    """Insert a file tracking record including optional email and return date.
+
+    Pass ``conn`` to insert inside a caller's transaction; it is not committed.
+    """
+    params = (*data, *tracking_date_columns(data[1], data[5]))
+    if conn is not None:
+        conn.execute(_INSERT_FILE_TRACKING, params)
+    else:
+        with create_connection() as conn:
+            conn.execute(_INSERT_FILE_TRACKING, params)
 
 
 def insert_activity_log(action_type, target_name, employee_code, performed_by, timestamp):
-    with create_connection() as conn:
-        conn.execute(
+    insert_activity_logs([(action_type, target_name, employee_code, performed_by, timestamp)])
+
+
+def insert_activity_logs(rows, conn=None):
+    """Insert ``(action_type, target_name, employee_code, performed_by, timestamp)`` rows.
+
+    Pass ``conn`` to reuse a long-lived connection, e.g. from a background thread.
+    """
+    with conn or create_connection() as conn:
+        conn.executemany(
             """
             INSERT INTO activity_logs (action_type, target_name, employee_code, performed_by, timestamp)
             VALUES (?, ?, ?, ?, ?);
             """,
-            (action_type, target_name, employee_code, performed_by, timestamp),
+            rows,
         )
 
 
 # ------------------ Retrieve Data ------------------ #
-def get_all_employees():
-    with create_connection() as conn:
-        return conn.execute(
-            "SELECT id, employee_code, name, designation, department, unit, company FROM employees;"
-        ).fetchall()
-
-def get_employees_by_companies(companies):
+EMPLOYEE_COLUMNS = "e.id, e.employee_code, e.name, e.designation, e.department, e.unit, e.company"
+SEARCH_COLUMNS = ("employee_code", "name", "department", "unit", "company")
+# Sort keys for the employee list; each has a matching index (migration 6).
+EMPLOYEE_SORTS = {
+    "code": "e.employee_code",
+    "name": "e.name",
+    "company": "ifnull(e.company, '')",
+}
+
+def employee_sort_key(row, sort="code"):
+    """Keyset cursor ``(sort value, id)`` for an employee list row."""
+    value = {"code": row[1], "name": row[2], "company": row[6] or ""}.get(sort, row[1])
+    return value, row[0]
+
+def _employee_filter(search=None, column="employee_code", companies=None):
+    """Return (FROM source, WHERE clauses, params) selecting matching employees.
+
+    Searches use the ``employees_fts`` trigram index; searches shorter than
+    three characters cannot be expressed as trigrams and fall back to
+    ``LIKE``.  ``companies`` restricts results to those companies when given.
+    """
+    source, clauses, params = "employees e", [], []
+    if search:
+        if column not in SEARCH_COLUMNS:
+            column = "employee_code"
+        if len(search) >= 3:
+            source = "employees_fts JOIN employees e ON e.id = employees_fts.rowid"
+            phrase = search.replace('"', '""')
+            clauses.append("employees_fts MATCH ?")
+            params.append(f'{column} : "{phrase}"')
+        else:
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append(f"e.{column} LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+    if companies is not None:
+        placeholders = ','.join('?' for _ in companies)
+        clauses.append(f"e.company IN ({placeholders})")
+        params.extend(companies)
+    return source, clauses, params
+
+def _employee_page(source, clauses, params, sort="code", after=None, before=None, limit=None):
+    """Select one keyset page of employees ordered by ``sort`` then id.
+
+    ``after``/``before`` are cursors from :func:`employee_sort_key`.  Rows
+    are always returned in ascending order; with ``before`` they are the
+    ``limit`` rows immediately preceding the cursor.
+    """
+    key = EMPLOYEE_SORTS.get(sort, EMPLOYEE_SORTS["code"])
+    clauses, params = list(clauses), list(params)
+    direction = "ASC"
+    cursor = after if after is not None else before
+    if cursor is not None:
+        op = ">" if after is not None else "<"
+        # The plain comparison lets SQLite range-scan expression indexes too.
+        clauses.append(f"{key} {op}= ? AND ({key}, e.id) {op} (?, ?)")
+        params.extend([cursor[0], cursor[0], cursor[1]])
+        if before is not None:
+            direction = "DESC"
+    query = f"SELECT {EMPLOYEE_COLUMNS} FROM {source}"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY {key} {direction}, e.id {direction}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    with read_connection() as conn:
+        rows = conn.execute(query + ";", params).fetchall()
+    return rows[::-1] if direction == "DESC" else rows
+
+def get_all_employees(sort="code", after=None, before=None, limit=None):
+    return _employee_page(*_employee_filter(), sort, after, before, limit)
+
+def get_employees_by_companies(companies, sort="code", after=None, before=None, limit=None):
     """Return employees whose company is in the provided list."""
     if not companies:
         return []
-    placeholders = ','.join('?' for _ in companies)
-    query = f"SELECT id, employee_code, name, designation, department, unit, company FROM employees WHERE company IN ({placeholders});"
-    with create_connection() as conn:
-        return conn.execute(query, companies).fetchall()
-
-def get_checklist_by_employee(employee_id):
-    with create_connection() as conn:
-        return conn.execute(
-            """
-            SELECT
-                document_name,
-                is_submitted,
-                verified_by,
-                reviewed_by,
-                verified_date,
-                file_path,
-                uploaded_by,
-                upload_date
-            FROM checklist
-            WHERE employee_id = ?;
-            """,
-            (employee_id,),
-        ).fetchall()
+    return _employee_page(*_employee_filter(companies=companies), sort, after, before, limit)
 
-def get_file_tracking_by_employee(employee_id):
-    """Return file tracking records for the given employee."""
-    with create_connection() as conn:
-        return conn.execute(
-            """
-            SELECT
-                id,
-                date_taken,
-                taken_by,
-                taken_by_email,
-                file_taken_time,
-                expected_return_date,
-                documents_taken,
-                status_of_documents
-            FROM file_tracking
-            WHERE employee_id = ?;
-            """,
-            (employee_id,),
-        ).fetchall()
+def search_employees(search, column="employee_code", companies=None,
+                     sort="code", after=None, before=None, limit=None):
+    """Return employees whose ``column`` contains ``search``, ignoring case."""
+    if companies is not None and not companies:
+        return []
+    return _employee_page(*_employee_filter(search, column, companies), sort, after, before, limit)
+
+def count_employees(search=None, column="employee_code", companies=None):
+    """Total number of employees matching the same filters as the list."""
+    if companies is not None and not companies:
+        return 0
+    with read_connection() as conn:
+        if not search:
+            # Served from the per-company rollup rather than counting rows.
+            query = "SELECT ifnull(SUM(employee_count), 0) FROM company_employee_counts"
+            params = []
+            if companies is not None:
+                placeholders = ','.join('?' for _ in companies)
+                query += f" WHERE company IN ({placeholders})"
+                params = companies
+            return conn.execute(query + ";", params).fetchone()[0]
+        source, clauses, params = _employee_filter(search, column, companies)
+        query = f"SELECT COUNT(*) FROM {source} WHERE " + " AND ".join(clauses)
+        return conn.execute(query + ";", params).fetchone()[0]
+
+def _file_tracking_rows(conn, employee_id):
+    return conn.execute(
+        """
+        SELECT
+            id,
+            date_taken,
+            taken_by,
+            taken_by_email,
+            file_taken_time,
+            expected_return_date,
+            documents_taken,
+            status_of_documents
+        FROM file_tracking
+        WHERE employee_id = ?;
+        """,
+        (employee_id,),
+    ).fetchall()
+
+CHECKLIST_STATUS_KEYS = (
+    "document_name", "is_submitted", "verified_by", "reviewed_by",
+    "verified_date", "file_path", "uploaded_by", "upload_date",
+)
+
+def _checklist_status(conn, employee_id):
+    """Every item in ``config.CHECKLIST_ITEMS`` with its latest submission.
+
+    Items never submitted get the 'Missed' / '-' placeholders the templates
+    expect; when a document was submitted more than once the newest row wins.
+    """
+    items = ", ".join("(?, ?)" for _ in config.CHECKLIST_ITEMS)
+    params = [v for pos, name in enumerate(config.CHECKLIST_ITEMS) for v in (pos, name)]
+    rows = conn.execute(
+        f"""
+        WITH items(position, document_name) AS (VALUES {items}),
+        latest AS (
+            SELECT document_name, MAX(id) AS id FROM checklist
+            WHERE employee_id = ? GROUP BY document_name
+        )
+        SELECT
+            items.document_name,
+            CASE WHEN c.id IS NULL THEN 'Missed' ELSE c.is_submitted END,
+            CASE WHEN c.id IS NULL THEN '-' ELSE c.verified_by END,
+            CASE WHEN c.id IS NULL THEN '-' ELSE c.reviewed_by END,
+            CASE WHEN c.id IS NULL THEN '-' ELSE c.verified_date END,
+            c.file_path,
+            c.uploaded_by,
+            c.upload_date
+        FROM items
+        LEFT JOIN latest ON latest.document_name = items.document_name
+        LEFT JOIN checklist c ON c.id = latest.id
+        ORDER BY items.position;
+        """,
+        (*params, employee_id),
+    ).fetchall()
+    return [dict(zip(CHECKLIST_STATUS_KEYS, row)) for row in rows]
+
+def get_employee_detail(employee_code, checklist=True, tracking=True):
+    """Load an employee with their checklist status and tracking history.
+
+    Everything is read on one connection inside one transaction, so the
+    detail page sees a consistent snapshot.  Returns
+    ``(employee, checklist_status, tracking_records)``; the employee is None
+    when the code is unknown and the other parts are None when not requested.
+    """
+    with read_connection() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        employee = conn.execute(
+            "SELECT * FROM employees WHERE employee_code = ?;", (employee_code,)
+        ).fetchone()
+        if employee is None:
+            return None, None, None
+        return (
+            employee,
+            _checklist_status(conn, employee[0]) if checklist else None,
+            _file_tracking_rows(conn, employee[0]) if tracking else None,
+        )
 
 def get_employee_by_id(employee_id):
-    with create_connection() as conn:
+    with read_connection() as conn:
         return conn.execute("""
             SELECT * FROM employees WHERE id = ?;
         """, (employee_id,)).fetchone()
 
 def get_employee_by_code(employee_code):
-    with create_connection() as conn:
+    with read_connection() as conn:
         return conn.execute("""
             SELECT * FROM employees WHERE employee_code = ?;
         """, (employee_code,)).fetchone()
 
 
 def get_unique_companies():
-    with create_connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT DISTINCT company FROM employees WHERE company IS NOT NULL AND company != ''"
         ).fetchall()
@@ -288,7 +489,7 @@ def insert_user_company(user_id, company):
         )
 
 def get_companies_by_user(user_id):
-    with create_connection() as conn:
+    with read_connection() as conn:
         rows = conn.execute(
             "SELECT company FROM user_companies WHERE user_id = ?;",
             (user_id,),
@@ -296,46 +497,92 @@ def get_companies_by_user(user_id):
         return [row[0] for row in rows]
 
 def get_employee_counts_by_company(companies=None):
-    """Return a list of (company, employee_count)."""
-    with create_connection() as conn:
+    """Return a list of (company, employee_count) from the rollup table."""
+    with report_connection() as conn:
+        query = (
+            "SELECT NULLIF(company, ''), employee_count FROM company_employee_counts "
+            "WHERE employee_count > 0"
+        )
+        params = []
         if companies:
             placeholders = ','.join('?' for _ in companies)
-            query = (
-                f"SELECT company, COUNT(*) FROM employees "
-                f"WHERE company IN ({placeholders}) GROUP BY company;"
-            )
-            rows = conn.execute(query, companies).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT company, COUNT(*) FROM employees GROUP BY company;"
-            ).fetchall()
+            query += f" AND company IN ({placeholders})"
+            params = companies
+        rows = conn.execute(query + " ORDER BY company;", params).fetchall()
     return rows
+
 def get_file_counts_by_month(companies=None):
-    """Return list of (YYYY-MM, file_count) for file tracking records."""
-    with create_connection() as conn:
-        base = """
-            SELECT
-                CASE
-                    WHEN ft.date_taken LIKE '%/%/%' THEN
-                        strftime('%Y-%m', printf('%s-%02d-%02d',
-                            substr(ft.date_taken, -4),
-                            CAST(substr(ft.date_taken, 1, instr(ft.date_taken, '/') - 1) AS INT),
-                            CAST(substr(ft.date_taken, instr(ft.date_taken, '/') + 1,
-                                         instr(substr(ft.date_taken, instr(ft.date_taken, '/') + 1), '/') - 1) AS INT)
-                        ))
-                    WHEN ft.date_taken LIKE '____-__-__' THEN substr(ft.date_taken, 1, 7)
-                END AS month
-            FROM file_tracking ft
-        """
+    """Return list of (YYYY-MM, file_count) from the rollup table."""
+    with report_connection() as conn:
+        query = "SELECT month, SUM(file_count) FROM company_monthly_file_counts"
         params = []
         if companies:
             placeholders = ','.join('?' for _ in companies)
-            base += f" JOIN employees e ON ft.employee_id = e.id WHERE e.company IN ({placeholders})"
+            query += f" WHERE company IN ({placeholders})"
             params = companies
-        query = f"SELECT month, COUNT(*) FROM ({base}) WHERE month IS NOT NULL GROUP BY month ORDER BY month;"
-        rows = conn.execute(query, params).fetchall()
+        rows = conn.execute(
+            query + " GROUP BY month HAVING SUM(file_count) > 0 ORDER BY month;", params
+        ).fetchall()
     return rows
 
+ACTIVITY_LOG_COLUMNS = "id, timestamp, performed_by, action_type, target_name, employee_code"
+
+def get_activity_logs(user=None, action=None, employee_code=None, since=None, until=None,
+                      after=None, before=None, limit=50):
+    """Return one page of activity log rows, newest first.
+
+    ``since``/``until`` are inclusive ``YYYY-MM-DD`` bounds.  ``after`` pages
+    to older rows (ids below it); ``before`` to newer rows (ids above it).
+    """
+    clauses, params = [], []
+    for column, value in (("performed_by", user), ("action_type", action),
+                          ("employee_code", employee_code)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        # Timestamps are 'YYYY-MM-DD HH:MM:SS', so the whole day sorts below 'YYYY-MM-DD~'.
+        clauses.append("timestamp < ?")
+        params.append(until + "~")
+    direction = "DESC"
+    if after is not None:
+        clauses.append("id < ?")
+        params.append(after)
+    elif before is not None:
+        clauses.append("id > ?")
+        params.append(before)
+        direction = "ASC"
+    query = f"SELECT {ACTIVITY_LOG_COLUMNS} FROM activity_logs"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY id {direction} LIMIT ?;"
+    params.append(limit)
+    with read_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return rows[::-1] if direction == "ASC" else rows
+
+def get_activity_actions():
+    """Distinct action types, for the log viewer's filter."""
+    # Hop from one action type to the next through the index (one seek per
+    # distinct value) instead of reading every log row.
+    with read_connection() as conn:
+        rows = conn.execute("""
+            WITH RECURSIVE actions(action_type) AS (
+                SELECT MIN(action_type) FROM activity_logs
+                UNION ALL
+                SELECT (
+                    SELECT MIN(action_type) FROM activity_logs
+                    WHERE action_type > actions.action_type
+                )
+                FROM actions WHERE actions.action_type IS NOT NULL
+            )
+            SELECT action_type FROM actions WHERE action_type IS NOT NULL;
+        """).fetchall()
+    return [row[0] for row in rows]
+
 # ------------------ Users ------------------ #
 def add_user(username, password, role, full_name=None, company=None, mobile_number=None, email=None, profile_photo=None):
     password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -353,13 +600,13 @@ def add_user(username, password, role, full_name=None, company=None, mobile_numb
 
 def verify_user(username, password):
     password_hash = hashlib.sha256(password.encode()).hexdigest()
-    with create_connection() as conn:
+    with read_connection() as conn:
         return conn.execute("""
             SELECT * FROM users WHERE username = ? AND password_hash = ?;
         """, (username, password_hash)).fetchone()
 
 def get_user_by_username(username):
-    with create_connection() as conn:
+    with read_connection() as conn:
         return conn.execute(
             "SELECT * FROM users WHERE username = ?;",
             (username,)
@@ -396,7 +643,9 @@ def update_file_tracking_entry(
                 file_taken_time = ?,
                 expected_return_date = ?,
                 documents_taken = ?,
-                status_of_documents = ?
+                status_of_documents = ?,
+                date_taken_iso = ?,
+                expected_return_date_iso = ?
          WHERE id = ?;
         """,
             (
@@ -407,6 +656,7 @@ def update_file_tracking_entry(
                 expected_return_date,
                 documents_taken,
                 status_of_documents,
+                *tracking_date_columns(date_taken, expected_return_date),
                 record_id,
             ),
               )
@@ -419,16 +669,22 @@ def update_tracking_email_and_return_date(record_id, email, expected_return_date
             """
             UPDATE file_tracking
             SET taken_by_email = ?,
-                expected_return_date = ?
+                expected_return_date = ?,
+                expected_return_date_iso = ?
             WHERE id = ?;
             """,
-            (email, expected_return_date, record_id),
+            (
+                email,
+                expected_return_date,
+                normalize_date(expected_return_date, day_first=True),
+                record_id,
+            ),
         )
 
 
 def get_admin_users():
     """Return all users with role 'admin'."""
-    with create_connection() as conn:
+    with read_connection() as conn:
         return conn.execute(
             "SELECT id, username, full_name, email, mobile_number FROM users WHERE role = 'admin';"
         ).fetchall()
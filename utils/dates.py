@@ -0,0 +1,20 @@
+from datetime import datetime
+
+
+def normalize_date(value, day_first=False):
+    """Return ``value`` as ``YYYY-MM-DD``, or None if it cannot be parsed.
+
+    Form inputs arrive as ISO dates, but imported records use slashes:
+    ``date_taken`` is month-first (``12/6/2022``) while
+    ``expected_return_date`` is day-first (``16/07/2025``).
+    """
+    if not value:
+        return None
+    value = value.strip()
+    slash_format = "%d/%m/%Y" if day_first else "%m/%d/%Y"
+    for fmt in ("%Y-%m-%d", slash_format):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
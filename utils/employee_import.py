@@ -0,0 +1,152 @@
+"""Bulk employee import from an HR master sheet, upserting on employee_code.
+
+    python -m utils.employee_import employees.csv [--chunk-size 1000]
+
+Rows are streamed from the CSV, validated, and compared with what is
+already stored.  New and changed rows are upserted with ``executemany`` in
+one transaction per chunk; unchanged rows are not written at all.  Only
+``employee_code`` and ``name`` are required: on existing employees, columns
+missing from the sheet are left as they are, so a partial sheet only
+updates what it carries.  ``id``, ``detected_entity`` and the ISO date
+columns are ignored or derived.
+"""
+import argparse
+import csv
+import time
+
+from utils.database import create_connection, employee_date_columns
+from utils.entity_classifier import classify_entity
+
+# Columns read from the sheet, in employees-table order.
+IMPORT_FIELDS = (
+    "employee_code", "name", "designation", "department", "unit",
+    "epf", "esi", "joining_date", "retirement_date", "leaving_date", "uan", "company",
+)
+REQUIRED_FIELDS = ("employee_code", "name")
+DEFAULT_CHUNK_SIZE = 1000
+
+# ISO columns derived from each of the date columns.
+_DERIVED_DATES = {
+    "joining_date": "joining_date_iso",
+    "retirement_date": "retirement_date_iso",
+    "leaving_date": "leaving_date_iso",
+}
+
+
+def _upsert_sql(fields):
+    """Upsert statement that only overwrites ``fields`` on existing employees."""
+    updated = [f for f in IMPORT_FIELDS[1:] if f in fields]
+    updated += [_DERIVED_DATES[f] for f in _DERIVED_DATES if f in fields]
+    updated.append("detected_entity")
+    assignments = ",\n        ".join(f"{column} = excluded.{column}" for column in updated)
+    return f"""
+    INSERT INTO employees (
+        employee_code, name, designation, department, unit,
+        epf, esi, joining_date, retirement_date, leaving_date, uan, company,
+        detected_entity, joining_date_iso, retirement_date_iso, leaving_date_iso
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (employee_code) DO UPDATE SET
+        {assignments};
+    """
+
+
+class ImportResult:
+    def __init__(self):
+        self.inserted = []
+        self.updated = []
+        self.unchanged = 0
+        self.rejected = []  # (line number, reason)
+        self.seconds = 0.0
+
+    def summary(self):
+        return (
+            f"{len(self.inserted)} added, {len(self.updated)} updated, "
+            f"{self.unchanged} unchanged, {len(self.rejected)} rejected "
+            f"in {self.seconds:.2f}s"
+        )
+
+
+def _clean(row):
+    values = tuple((row.get(field) or "").strip() for field in IMPORT_FIELDS)
+    missing = [f for f, v in zip(IMPORT_FIELDS, values) if f in REQUIRED_FIELDS and not v]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    return values, None
+
+
+def import_employees(csv_file, chunk_size=DEFAULT_CHUNK_SIZE, allowed_companies=None):
+    """Upsert employees from an open CSV text stream and return an ImportResult.
+
+    ``allowed_companies``, when given, rejects rows for any other company, and
+    rows for employee codes already stored under any other company, so
+    company-scoped admins can only touch their own employees.
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    reader = csv.DictReader(csv_file)
+    absent = [f for f in REQUIRED_FIELDS if f not in (reader.fieldnames or [])]
+    if absent:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(absent)}")
+
+    fields = set(reader.fieldnames)
+    upsert = _upsert_sql(fields)
+
+    conn = create_connection()
+    columns = ", ".join(IMPORT_FIELDS)
+    existing = {
+        row[0]: tuple("" if v is None else v for v in row)
+        for row in conn.execute(f"SELECT {columns} FROM employees")
+    }
+
+    chunk = []
+
+    def flush():
+        with conn:
+            conn.executemany(upsert, chunk)
+        chunk.clear()
+
+    # Line 1 is the header.
+    for line_no, row in enumerate(reader, start=2):
+        values, error = _clean(row)
+        previous = existing.get(values[0]) if error is None else None
+        if previous is not None:
+            # Columns the sheet does not carry keep their stored values.
+            values = tuple(
+                value if field in fields else old
+                for field, value, old in zip(IMPORT_FIELDS, values, previous)
+            )
+        if error is None and allowed_companies is not None:
+            if values[-1] not in allowed_companies:
+                error = f"company {values[-1]!r} not permitted"
+            elif previous is not None and previous[-1] not in allowed_companies:
+                # Scoped admins may not take over another company's employee code.
+                error = f"employee {values[0]} belongs to company {previous[-1]!r}"
+        if error:
+            result.rejected.append((line_no, error))
+            continue
+        code = values[0]
+        if previous == values:
+            result.unchanged += 1
+            continue
+        (result.updated if previous else result.inserted).append(code)
+        existing[code] = values
+        chunk.append((*values, classify_entity(code), *employee_date_columns(values)))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import or update employees from a CSV file.")
+    parser.add_argument("csv_file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.csv_file, newline="", encoding="utf-8-sig") as f:
+        result = import_employees(f, args.chunk_size)
+    for line_no, reason in result.rejected:
+        print(f"line {line_no}: {reason}")
+    print(result.summary())
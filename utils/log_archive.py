@@ -0,0 +1,219 @@
+"""Rotation and archival of the activity log.
+
+    python -m utils.log_archive rotate [--max-bytes N] [--daily] [--force]
+    python -m utils.log_archive archive-db [--days N]
+    python -m utils.log_archive query [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+                                     [--user U] [--action A] [--employee-code C]
+
+``rotate`` moves ``logs/activity_log.csv`` aside once it passes
+``ACTIVITY_LOG_ROTATE_BYTES`` (or, with ``--daily``, once it holds an
+earlier day's records) and compresses it into ``logs/archive`` as a gzip
+segment.  ``logs/archive/manifest.json`` records each segment's first and
+last timestamp, so ``query`` only opens segments that overlap the window.
+The logger opens the live file per batch, so after a rotation it simply
+starts a new one.
+
+``archive-db`` applies the same retention to the database, moving
+``activity_logs`` rows older than ``ACTIVITY_LOG_RETENTION_DAYS`` into
+``activity_logs_archive`` in batches.
+"""
+import argparse
+import csv
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta
+
+import config
+from utils.database import create_connection
+from utils.logger import LOG_FILE
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(LOG_FILE) or '.', 'archive')
+MANIFEST = os.path.join(ARCHIVE_DIR, 'manifest.json')
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+ARCHIVE_BATCH_SIZE = 5000
+
+
+# ------------------ CSV segments ------------------ #
+def _timestamp(row):
+    """The row's timestamp, or None for lines that are not a well-formed record."""
+    if not row:
+        return None
+    try:
+        datetime.strptime(row[0], TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+    return row[0]
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _save_manifest(segments):
+    tmp = MANIFEST + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(segments, f, indent=1)
+    os.replace(tmp, MANIFEST)
+
+
+def _compress(path):
+    """Gzip a rotated-out CSV into the archive and add it to the manifest."""
+    start = end = None
+    rows = 0
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        for row in csv.reader(f):
+            rows += 1
+            ts = _timestamp(row)
+            if ts:
+                start = ts if start is None or ts < start else start
+                end = ts if end is None or ts > end else end
+    if rows == 0:
+        os.remove(path)
+        return None
+
+    stamp = datetime.strptime(start or '1970-01-01 00:00:00', TIMESTAMP_FORMAT)
+    base = f"activity_log-{stamp:%Y%m%dT%H%M%S}"
+    name = f"{base}.csv.gz"
+    n = 1
+    while os.path.exists(os.path.join(ARCHIVE_DIR, name)):
+        n += 1
+        name = f"{base}-{n}.csv.gz"
+    target = os.path.join(ARCHIVE_DIR, name)
+    with open(path, 'rb') as src, gzip.open(target + '.tmp', 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(target + '.tmp', target)
+
+    segment = {'file': name, 'start': start, 'end': end, 'rows': rows,
+               'bytes': os.path.getsize(target)}
+    segments = load_manifest()
+    segments.append(segment)
+    segments.sort(key=lambda s: s['start'] or '')
+    _save_manifest(segments)
+    os.remove(path)
+    return segment
+
+
+def _needs_rotation(max_bytes, daily):
+    try:
+        size = os.path.getsize(LOG_FILE)
+    except FileNotFoundError:
+        return False
+    if size == 0:
+        return False
+    if max_bytes and size >= max_bytes:
+        return True
+    if daily:
+        with open(LOG_FILE, newline='', encoding='utf-8', errors='replace') as f:
+            first = _timestamp(next(csv.reader(f), None))
+        return first is not None and first[:10] < datetime.now().strftime('%Y-%m-%d')
+    return False
+
+
+def rotate(max_bytes=None, daily=False, force=False):
+    """Rotate the live CSV if due and return the new manifest entries."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    max_bytes = config.ACTIVITY_LOG_ROTATE_BYTES if max_bytes is None else max_bytes
+    if force or _needs_rotation(max_bytes, daily):
+        rotated = f"{LOG_FILE}.rotating-{datetime.now():%Y%m%d%H%M%S}-{os.getpid()}"
+        try:
+            os.replace(LOG_FILE, rotated)
+        except FileNotFoundError:
+            pass  # Nothing logged since the last rotation.
+        else:
+            # Let a batch that opened the old file just before the rename finish.
+            time.sleep(config.ACTIVITY_LOG_FLUSH_SECONDS + 1)
+    # Also picks up files left behind by an interrupted rotation.
+    return [s for s in map(_compress, sorted(glob.glob(f"{LOG_FILE}.rotating-*"))) if s]
+
+
+def query(since=None, until=None, user=None, action=None, employee_code=None):
+    """Yield archived and live CSV rows in the window, oldest segment first.
+
+    ``since``/``until`` are inclusive ``YYYY-MM-DD`` bounds; only segments
+    whose recorded range overlaps them are opened.
+    """
+    low = since or ''
+    high = (until + '~') if until else '~'
+    paths = [
+        os.path.join(ARCHIVE_DIR, s['file']) for s in load_manifest()
+        if s['start'] is not None and s['start'] < high and s['end'] >= low
+    ]
+    if os.path.exists(LOG_FILE):
+        paths.append(LOG_FILE)
+    wanted = ((1, user), (2, action), (4, employee_code))
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', newline='', encoding='utf-8', errors='replace') as f:
+            for row in csv.reader(f):
+                ts = _timestamp(row)
+                if ts is None or not (low <= ts < high):
+                    continue
+                if any(value and (len(row) <= i or row[i] != value) for i, value in wanted):
+                    continue
+                yield row
+
+
+# ------------------ Database ------------------ #
+def archive_db_rows(days=None):
+    """Move ``activity_logs`` rows older than ``days`` days into the archive table."""
+    days = config.ACTIVITY_LOG_RETENTION_DAYS if days is None else days
+    if not days:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    conn = create_connection()
+    moved = 0
+    while True:
+        # Short transactions, so the live logger is never blocked for long.
+        with conn:
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM activity_logs WHERE timestamp < ? ORDER BY timestamp LIMIT ?",
+                (cutoff, ARCHIVE_BATCH_SIZE),
+            )]
+            if not ids:
+                return moved
+            placeholders = ','.join('?' for _ in ids)
+            conn.execute(
+                f"INSERT INTO activity_logs_archive SELECT * FROM activity_logs "
+                f"WHERE id IN ({placeholders})",
+                ids,
+            )
+            conn.execute(f"DELETE FROM activity_logs WHERE id IN ({placeholders})", ids)
+        moved += len(ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rotate, archive and search activity logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("rotate", help="compress the live CSV into an archive segment")
+    p.add_argument("--max-bytes", type=int)
+    p.add_argument("--daily", action="store_true", help="rotate once the file holds an earlier day")
+    p.add_argument("--force", action="store_true")
+    p = commands.add_parser("archive-db", help="move old activity_logs rows to the archive table")
+    p.add_argument("--days", type=int)
+    p = commands.add_parser("query", help="print CSV log rows in a date window")
+    p.add_argument("--since")
+    p.add_argument("--until")
+    p.add_argument("--user")
+    p.add_argument("--action")
+    p.add_argument("--employee-code")
+    args = parser.parse_args()
+
+    if args.command == "rotate":
+        for segment in rotate(args.max_bytes, args.daily, args.force):
+            print(f"Archived {segment['rows']} rows ({segment['start']} .. {segment['end']}) "
+                  f"to {segment['file']}")
+    elif args.command == "archive-db":
+        print(f"Moved {archive_db_rows(args.days)} rows to activity_logs_archive")
+    else:
+        writer = csv.writer(sys.stdout)
+        for row in query(args.since, args.until, args.user, args.action, args.employee_code):
+            writer.writerow(row)
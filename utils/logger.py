@@ -1,13 +1,165 @@
+"""Activity log.
+
+``log_action`` only enqueues the record; a background thread writes queued
+records to ``activity_logs`` in batches with ``executemany`` and, when
+``ACTIVITY_LOG_CSV`` is set, appends them to that CSV file.  Each CSV line
+goes out in a single ``O_APPEND`` write, so lines from concurrent workers
+never interleave.  The queue is bounded: when it is full the caller writes
+its record directly instead of dropping it.  Pending records are flushed
+at interpreter exit.
+"""
+import atexit
 import csv
+import io
 import os
+import queue
+import threading
 from datetime import datetime
-from utils.database import insert_activity_log
+from time import monotonic
+
+import config
+from utils.database import insert_activity_logs, own_connection
+
+LOG_FILE = config.ACTIVITY_LOG_CSV
+
+_STOP = object()
+_lock = threading.Lock()
+_queue = None
+_worker = None
+_pid = None
+
+
+def _csv_line(record):
+    timestamp, user, action, target, employee_code = record
+    buf = io.StringIO()
+    csv.writer(buf).writerow([timestamp, user, action, target, employee_code or ""])
+    return buf.getvalue().encode('utf-8')
+
+
+def _write_csv(records):
+    # Opened per batch rather than kept open, so a rotation (utils.log_archive)
+    # can rename the file and the next batch starts a fresh one.
+    os.makedirs(os.path.dirname(LOG_FILE) or '.', exist_ok=True)
+    fd = os.open(LOG_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        for record in records:
+            os.write(fd, _csv_line(record))
+    finally:
+        os.close(fd)
+
+
+def _write(records, conn=None):
+    try:
+        insert_activity_logs([
+            (action, target, employee_code, user, timestamp)
+            for timestamp, user, action, target, employee_code in records
+        ], conn)
+    except Exception as e:
+        print("Activity log error:", e)
+    if LOG_FILE:
+        try:
+            _write_csv(records)
+        except OSError as e:
+            print("Activity log CSV error:", e)
+
+
+def _run(q):
+    # The thread runs outside any app context, so hold one connection for
+    # its lifetime rather than opening (and profiling) one per batch.
+    conn = own_connection()
+    try:
+        _drain(q, conn)
+    finally:
+        conn.close()
+
+
+def _drain(q, conn):
+    while True:
+        item = q.get()
+        if item is _STOP:
+            return
+        batch = [item]
+        stop = False
+        deadline = monotonic() + config.ACTIVITY_LOG_FLUSH_SECONDS
+        while len(batch) < config.ACTIVITY_LOG_BATCH_SIZE:
+            try:
+                item = q.get(timeout=max(0, deadline - monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        _write(batch, conn)
+        if stop:
+            return
+
+
+def _ensure_worker():
+    """Return the queue, starting the writer thread in this process if needed."""
+    global _queue, _worker, _pid
+    with _lock:
+        # A forked worker inherits the queue object but not the thread.
+        if _pid != os.getpid() or _worker is None:
+            _queue = queue.Queue(maxsize=config.ACTIVITY_LOG_QUEUE_SIZE)
+            _worker = threading.Thread(
+                target=_run, args=(_queue,), name="activity-log", daemon=True
+            )
+            _worker.start()
+            _pid = os.getpid()
+        return _queue
+
+
+def flush(timeout=10):
+    """Write out every queued record and stop the writer thread."""
+    global _worker
+    with _lock:
+        worker, q = _worker, _queue
+        if worker is None or _pid != os.getpid():
+            return
+        _worker = None
+    q.put(_STOP)
+    worker.join(timeout)
+
+
+atexit.register(flush)
+
+
+def read_csv_tail(limit=100, path=None, block_size=64 * 1024):
+    """Return the last ``limit`` rows of the CSV log, newest first.
+
+    The file is read backwards in blocks from its end, so the cost depends
+    on ``limit`` rather than on how large the log has grown.
+    """
+    path = path or LOG_FILE
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    with f:
+        pos, data = f.seek(0, os.SEEK_END), b""
+        # One extra line so the first (possibly partial) line can be dropped.
+        while pos > 0 and data.count(b"\n") <= limit:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    if pos > 0:
+        lines = lines[1:]
+    return list(csv.reader(lines[-limit:]))[::-1]
 
-LOG_FILE = 'logs/activity_log.csv'
 
 def log_action(user, action, target="", employee_code=None):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
-    with open(LOG_FILE, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([timestamp, user, action, target, employee_code or ""])
\ No newline at end of file
+    record = (timestamp, user, action, target, employee_code)
+    try:
+        _ensure_worker().put(record, timeout=1)
+    except queue.Full:
+        # Inside a request, create_connection() is the request's connection
+        # and committing on it would commit the request's open work too.
+        conn = own_connection()
+        try:
+            _write([record], conn)
+        finally:
+            conn.close()
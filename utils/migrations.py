@@ -0,0 +1,369 @@
+"""Numbered schema migrations, tracked with ``PRAGMA user_version``.
+
+Run ``python -m utils.migrations`` once per deploy; the app itself only
+checks that the database is at ``LATEST_VERSION`` when it starts.
+"""
+import argparse
+import hashlib
+
+from utils.database import create_connection
+from utils.dates import normalize_date
+from utils.rollups import create_rollups, rebuild_rollups
+
+
+def _add_missing_columns(conn, table, columns):
+    existing = [c[1] for c in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    for col in columns:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} TEXT")
+
+
+# ------------------ Migrations ------------------ #
+def _initial_schema(conn):
+    """Baseline schema; also upgrades databases created before migrations."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_code TEXT NOT NULL,
+            name TEXT NOT NULL,
+            designation TEXT NOT NULL,
+            department TEXT NOT NULL,
+            unit TEXT NOT NULL,
+            epf TEXT NOT NULL,
+            esi TEXT NOT NULL,
+            joining_date TEXT NOT NULL,
+            retirement_date TEXT NOT NULL,
+            leaving_date TEXT NOT NULL,
+            uan TEXT NOT NULL,
+            detected_entity TEXT NOT NULL,
+            company TEXT
+        );
+    """)
+    _add_missing_columns(conn, "employees", ["company"])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS checklist (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            document_name TEXT NOT NULL,
+            is_submitted TEXT NOT NULL,
+            verified_by TEXT,
+            reviewed_by TEXT,
+            verified_date TEXT,
+            file_path TEXT,
+            uploaded_by TEXT,
+            upload_date TEXT,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        );
+    """)
+    _add_missing_columns(conn, "checklist", ["file_path", "uploaded_by", "upload_date"])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS file_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            date_taken TEXT NOT NULL,
+            taken_by TEXT NOT NULL,
+            taken_by_email TEXT,
+            file_taken_time TEXT NOT NULL,
+            expected_return_date TEXT,
+            documents_taken TEXT NOT NULL,
+            status_of_documents TEXT NOT NULL,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        );
+    """)
+    _add_missing_columns(conn, "file_tracking", ["taken_by_email", "expected_return_date"])
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            full_name TEXT,
+            company TEXT,
+            mobile_number TEXT,
+            email TEXT,
+            profile_photo TEXT
+        );
+    """)
+    _add_missing_columns(
+        conn, "users", ["full_name", "company", "mobile_number", "email", "profile_photo"]
+    )
+    if conn.execute("SELECT COUNT(*) FROM users WHERE role = 'super_admin'").fetchone()[0] == 0:
+        password_hash = hashlib.sha256('SuperAdmin123'.encode()).hexdigest()
+        conn.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+            ('superadmin', password_hash, 'super_admin'),
+        )
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_companies (
+            user_id INTEGER NOT NULL,
+            company TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        );
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS activity_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            action_type TEXT NOT NULL,
+            target_name TEXT,
+            employee_code TEXT,
+            performed_by TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        );
+    """)
+
+
+def _lookup_indexes(conn):
+    """Index the columns every detail page and company filter looks up by."""
+    duplicates = conn.execute(
+        "SELECT employee_code, COUNT(*) FROM employees "
+        "GROUP BY employee_code HAVING COUNT(*) > 1 LIMIT 20"
+    ).fetchall()
+    if duplicates:
+        codes = ", ".join(f"{code} (x{count})" for code, count in duplicates)
+        raise RuntimeError(
+            f"Duplicate employee codes must be resolved before migrating: {codes}"
+        )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_employees_code ON employees (employee_code)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_company ON employees (company)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_checklist_employee ON checklist (employee_id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_file_tracking_employee ON file_tracking (employee_id)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_user_companies_user ON user_companies (user_id)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)")
+
+
+def _iso_date_columns(conn):
+    """Add ISO date columns next to the free-form ones, backfilled and indexed."""
+    conn.create_function("normalize_date", 2, normalize_date, deterministic=True)
+    _add_missing_columns(
+        conn, "file_tracking", ["date_taken_iso", "expected_return_date_iso"]
+    )
+    _add_missing_columns(
+        conn, "employees", ["joining_date_iso", "retirement_date_iso", "leaving_date_iso"]
+    )
+    conn.execute("""
+        UPDATE file_tracking
+        SET date_taken_iso = normalize_date(date_taken, 0),
+            expected_return_date_iso = normalize_date(expected_return_date, 1);
+    """)
+    conn.execute("""
+        UPDATE employees
+        SET joining_date_iso = normalize_date(joining_date, 0),
+            retirement_date_iso = normalize_date(retirement_date, 0),
+            leaving_date_iso = normalize_date(leaving_date, 0);
+    """)
+    # (employee_id, date_taken_iso) covers the per-company monthly counts and
+    # makes the plain employee_id index redundant.
+    conn.execute("DROP INDEX IF EXISTS idx_file_tracking_employee")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_file_tracking_employee_date "
+        "ON file_tracking (employee_id, date_taken_iso)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_file_tracking_date_taken ON file_tracking (date_taken_iso)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_file_tracking_expected_return "
+        "ON file_tracking (expected_return_date_iso)"
+    )
+    for col in ("joining_date_iso", "retirement_date_iso", "leaving_date_iso"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_employees_{col} ON employees ({col})")
+
+
+def _dashboard_rollups(conn):
+    create_rollups(conn)
+    rebuild_rollups(conn)
+
+
+def _employee_search_index(conn):
+    """Trigram FTS5 index over the searchable employee columns."""
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+            employee_code, name, department, unit, company,
+            content='employees', content_rowid='id', tokenize='trigram'
+        );
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS employees_fts_insert AFTER INSERT ON employees
+        BEGIN
+            INSERT INTO employees_fts (rowid, employee_code, name, department, unit, company)
+            VALUES (NEW.id, NEW.employee_code, NEW.name, NEW.department, NEW.unit, NEW.company);
+        END;
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS employees_fts_delete AFTER DELETE ON employees
+        BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, employee_code, name, department, unit, company)
+            VALUES ('delete', OLD.id, OLD.employee_code, OLD.name, OLD.department, OLD.unit, OLD.company);
+        END;
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS employees_fts_update
+        AFTER UPDATE OF employee_code, name, department, unit, company ON employees
+        BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, employee_code, name, department, unit, company)
+            VALUES ('delete', OLD.id, OLD.employee_code, OLD.name, OLD.department, OLD.unit, OLD.company);
+            INSERT INTO employees_fts (rowid, employee_code, name, department, unit, company)
+            VALUES (NEW.id, NEW.employee_code, NEW.name, NEW.department, NEW.unit, NEW.company);
+        END;
+    """)
+    conn.execute("INSERT INTO employees_fts (employees_fts) VALUES ('rebuild');")
+
+
+def _employee_sort_indexes(conn):
+    """Indexes backing keyset pagination of the employee list by name and company."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_name ON employees (name)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_employees_company_sort ON employees (ifnull(company, ''))"
+    )
+
+
+def _activity_log_indexes(conn):
+    """Indexes for filtering the activity log viewer; each also orders by id."""
+    for column in ("performed_by", "action_type", "employee_code", "timestamp"):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_activity_logs_{column} ON activity_logs ({column})"
+        )
+
+
+def _activity_log_archive(conn):
+    """Cold storage for activity_logs rows past the retention period."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS activity_logs_archive (
+            id INTEGER PRIMARY KEY,
+            action_type TEXT NOT NULL,
+            target_name TEXT,
+            employee_code TEXT,
+            performed_by TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        );
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_activity_logs_archive_timestamp "
+        "ON activity_logs_archive (timestamp)"
+    )
+
+
+def _email_outbox(conn):
+    """Queued outgoing email, drained by utils/outbox.py."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            to_address TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            sent_at TEXT
+        );
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_email_outbox_due "
+        "ON email_outbox (status, next_attempt_at)"
+    )
+
+
+def _overdue_digest_ledger(conn):
+    """One row per overdue-files digest queued, so reruns skip recipients already done."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS overdue_digests (
+            recipient TEXT NOT NULL,
+            digest_date TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            email_id INTEGER,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (recipient, digest_date)
+        ) WITHOUT ROWID;
+    """)
+
+
+# (version, description, function) -- append only, never renumber.
+MIGRATIONS = [
+    (1, "initial schema", _initial_schema),
+    (2, "lookup indexes", _lookup_indexes),
+    (3, "ISO date columns", _iso_date_columns),
+    (4, "dashboard rollups", _dashboard_rollups),
+    (5, "employee search index", _employee_search_index),
+    (6, "employee sort indexes", _employee_sort_indexes),
+    (7, "activity log indexes", _activity_log_indexes),
+    (8, "activity log archive table", _activity_log_archive),
+    (9, "email outbox", _email_outbox),
+    (10, "overdue digest ledger", _overdue_digest_ledger),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ------------------ Runner ------------------ #
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn=None):
+    """Apply pending migrations and return the versions that were applied.
+
+    Each migration runs in its own ``BEGIN IMMEDIATE`` transaction together
+    with the ``user_version`` bump, so concurrent runners serialize and a
+    failed step leaves the database at the previous version.
+    """
+    conn = conn or create_connection()
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+    conn.isolation_level = None
+    applied = []
+    for version, _, func in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.execute("ROLLBACK")
+                continue
+            func(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
+
+
+def verify_schema_version():
+    """Raise if the database has not been migrated to ``LATEST_VERSION``."""
+    conn = create_connection()
+    try:
+        version = get_schema_version(conn)
+    finally:
+        conn.close()
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}. "
+            "Run `python -m utils.migrations` to upgrade."
+        )
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the database schema version.")
+    parser.add_argument("command", nargs="?", default="migrate", choices=["migrate", "status"])
+    args = parser.parse_args()
+
+    conn = create_connection()
+    if args.command == "status":
+        print(f"Schema version {get_schema_version(conn)} (latest {LATEST_VERSION})")
+    else:
+        for version in migrate(conn):
+            print(f"Applied migration {version}: {MIGRATIONS[version - 1][1]}")
+        print(f"Schema is at version {get_schema_version(conn)}")
+    conn.close()
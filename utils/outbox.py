@@ -0,0 +1,228 @@
+"""Email outbox.
+
+``queue_email`` writes the message to the ``email_outbox`` table and wakes
+a background thread, so requests never wait on the mail server.  The
+worker claims pending messages in batches and sends them over a single
+SMTP connection that stays open while there is work.  A failed message is
+retried with exponential backoff; after ``OUTBOX_MAX_ATTEMPTS`` it is
+marked ``dead`` and kept for inspection.
+
+Claims are a single ``UPDATE ... RETURNING``, so several app workers (or
+``python -m utils.outbox``) can drain the same table without sending a
+message twice.  A claim is a lease: if the sender dies mid-batch, the
+message becomes due again after ``OUTBOX_LEASE_SECONDS``.
+
+For local testing, point ``SMTP_SERVER``/``SMTP_PORT`` at a debugging
+server, leave the credentials unset and set ``SMTP_STARTTLS=0``;
+``python -m utils.outbox_check`` does this against a scratch database.
+"""
+import argparse
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+import config
+from utils.database import create_connection
+
+_wake = threading.Event()
+_lock = threading.Lock()
+_worker = None
+_pid = None
+
+
+def _now(offset=0):
+    return (datetime.now() + timedelta(seconds=offset)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def smtp_configured():
+    return bool(config.SMTP_SERVER) and (
+        not config.SMTP_USERNAME or bool(config.SMTP_PASSWORD)
+    )
+
+
+def queue_email(to_address, subject, body, conn=None, wake=True):
+    """Add a message to the outbox; returns its id, or None if SMTP is not configured.
+
+    Pass ``conn`` to enqueue inside a caller's transaction, and ``wake=False``
+    when the caller drains the outbox itself.
+    """
+    if not smtp_configured():
+        print("SMTP not configured; skipping email send")
+        return None
+    sql = (
+        "INSERT INTO email_outbox (to_address, subject, body, status, attempts, "
+        "next_attempt_at, created_at) VALUES (?, ?, ?, 'pending', 0, ?, ?)"
+    )
+    params = (to_address, subject, body, _now(), _now())
+    if conn is not None:
+        email_id = conn.execute(sql, params).lastrowid
+    else:
+        with create_connection() as conn:
+            email_id = conn.execute(sql, params).lastrowid
+    if wake and config.OUTBOX_WORKER:
+        _ensure_worker()
+        _wake.set()
+    return email_id
+
+
+# ------------------ Delivery ------------------ #
+def _connect():
+    server = smtplib.SMTP(config.SMTP_SERVER, config.SMTP_PORT, timeout=config.SMTP_TIMEOUT)
+    if config.SMTP_STARTTLS:
+        server.starttls()
+    if config.SMTP_USERNAME:
+        server.login(config.SMTP_USERNAME, config.SMTP_PASSWORD)
+    return server
+
+
+def _claim(conn, limit):
+    with conn:
+        return conn.execute(
+            """
+            UPDATE email_outbox
+            SET status = 'sending', next_attempt_at = ?
+            WHERE id IN (
+                SELECT id FROM email_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+            )
+            RETURNING id, to_address, subject, body, attempts;
+            """,
+            (_now(config.OUTBOX_LEASE_SECONDS), _now(), limit),
+        ).fetchall()
+
+
+def _mark_sent(conn, email_id):
+    with conn:
+        conn.execute(
+            "UPDATE email_outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+            (_now(), email_id),
+        )
+
+
+def _mark_failed(conn, email_id, attempts, error):
+    attempts += 1
+    if attempts >= config.OUTBOX_MAX_ATTEMPTS:
+        status, due = 'dead', None
+    else:
+        delay = min(config.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), 3600)
+        status, due = 'pending', _now(delay)
+    with conn:
+        conn.execute(
+            "UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+            "WHERE id = ?",
+            (status, attempts, due, str(error)[:500], email_id),
+        )
+
+
+class Sender:
+    """Delivers outbox batches, reusing one SMTP connection between them."""
+
+    def __init__(self, connect=_connect):
+        self._connect = connect
+        self._server = None
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _send(self, message):
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped an idle connection; reconnect once.
+            self._server = self._connect()
+            self._server.send_message(message)
+
+    def send_batch(self, conn):
+        """Send one claimed batch; returns the number of messages claimed."""
+        batch = _claim(conn, config.OUTBOX_BATCH_SIZE)
+        for email_id, to_address, subject, body, attempts in batch:
+            message = EmailMessage()
+            message["Subject"] = subject
+            message["From"] = config.EMAIL_FROM
+            message["To"] = to_address
+            message.set_content(body)
+            try:
+                self._send(message)
+            except Exception as e:
+                if not isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)):
+                    # Possibly a broken connection: start a fresh one next time.
+                    self.close()
+                _mark_failed(conn, email_id, attempts, e)
+            else:
+                _mark_sent(conn, email_id)
+        return len(batch)
+
+    def drain(self, conn=None):
+        """Send until nothing is due; returns the number of messages processed."""
+        conn = conn or create_connection()
+        total = 0
+        while True:
+            sent = self.send_batch(conn)
+            total += sent
+            if sent < config.OUTBOX_BATCH_SIZE:
+                return total
+
+
+def _run():
+    sender = Sender()
+    conn = create_connection()
+    while True:
+        _wake.wait(config.OUTBOX_POLL_SECONDS)
+        _wake.clear()
+        try:
+            sender.drain(conn)
+        except Exception as e:
+            print("Email outbox error:", e)
+        # Hang up when idle rather than holding the connection open.
+        sender.close()
+
+
+def _ensure_worker():
+    global _worker, _pid
+    with _lock:
+        if _worker is None or _pid != os.getpid():
+            _worker = threading.Thread(target=_run, name="email-outbox", daemon=True)
+            _worker.start()
+            _pid = os.getpid()
+
+
+def start_worker():
+    """Start or wake the in-process sender, e.g. at app startup to send leftovers
+    or after committing messages queued with ``wake=False``."""
+    if config.OUTBOX_WORKER and smtp_configured():
+        _ensure_worker()
+        _wake.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send queued emails from the outbox.")
+    parser.add_argument("--once", action="store_true", help="send what is due and exit")
+    args = parser.parse_args()
+
+    sender = Sender()
+    conn = create_connection()
+    try:
+        while True:
+            started = time.perf_counter()
+            count = sender.drain(conn)
+            if count:
+                print(f"Processed {count} emails in {time.perf_counter() - started:.2f}s")
+            if args.once:
+                break
+            sender.close()
+            time.sleep(config.OUTBOX_POLL_SECONDS)
+    finally:
+        sender.close()
+        conn.close()
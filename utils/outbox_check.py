@@ -0,0 +1,157 @@
+"""Check the email outbox against a local SMTP stand-in.
+
+Starts a debugging SMTP server on a free local port, points the outbox at
+it and at a scratch database, then drains messages through ``Sender``:
+
+* deliverable messages arrive, over a single SMTP connection;
+* a rejected message goes back to ``pending`` with exponential backoff and
+  is not retried before it is due;
+* after ``OUTBOX_MAX_ATTEMPTS`` rejections it is marked ``dead``.
+
+    python -m utils.outbox_check
+
+Exits non-zero when any of these does not hold.  The stand-in uses the
+standard library ``smtpd`` module, so this needs Python 3.11 or older.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import warnings
+from datetime import datetime
+
+import config
+from utils import database, outbox
+from utils.migrations import _email_outbox
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import asyncore
+    import smtpd
+
+REJECTED = "reject@example.com"
+MAX_ATTEMPTS = 3
+
+
+class _StandIn(smtpd.SMTPServer):
+    """Keeps every message it accepts and refuses mail to ``REJECTED``."""
+
+    def __init__(self, socket_map):
+        super().__init__(("127.0.0.1", 0), None, map=socket_map, decode_data=True)
+        self.received = []
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        if REJECTED in rcpttos:
+            return "550 mailbox unavailable"
+        self.received.extend(rcpttos)
+
+
+def _delay(due):
+    """Seconds from now until ``due``, an outbox timestamp."""
+    return (datetime.strptime(due, "%Y-%m-%d %H:%M:%S") - datetime.now()).total_seconds()
+
+
+def check_outbox():
+    """Return a list of problems; an empty list means the outbox behaves."""
+    scratch_dir = tempfile.mkdtemp()
+    socket_map = {}
+    server = _StandIn(socket_map)
+    loop = threading.Thread(
+        target=asyncore.loop, kwargs={"timeout": 0.05, "map": socket_map}, daemon=True
+    )
+    loop.start()
+
+    settings = ("SMTP_SERVER", "SMTP_PORT", "SMTP_USERNAME", "SMTP_STARTTLS",
+                "OUTBOX_WORKER", "OUTBOX_MAX_ATTEMPTS")
+    original_settings = {name: getattr(config, name) for name in settings}
+    config.SMTP_SERVER = "127.0.0.1"
+    config.SMTP_PORT = server.socket.getsockname()[1]
+    config.SMTP_USERNAME = None
+    config.SMTP_STARTTLS = False
+    config.OUTBOX_WORKER = False
+    config.OUTBOX_MAX_ATTEMPTS = MAX_ATTEMPTS
+    original_pool = database._pool
+    database._pool = database.ConnectionPool(os.path.join(scratch_dir, "outbox_check.db"), size=1)
+
+    connects = []
+
+    def connect():
+        connects.append(1)
+        return outbox._connect()
+
+    sender = outbox.Sender(connect)
+    problems = []
+    conn = database.create_connection()
+    try:
+        with conn:
+            _email_outbox(conn)
+        for n in range(3):
+            outbox.queue_email(f"user{n}@example.com", "Outbox check", "Delivered.", conn=conn)
+        rejected_id = outbox.queue_email(REJECTED, "Outbox check", "Refused.", conn=conn)
+        conn.commit()
+
+        def rejected():
+            return conn.execute(
+                "SELECT status, attempts, next_attempt_at, last_error FROM email_outbox WHERE id = ?",
+                (rejected_id,),
+            ).fetchone()
+
+        # Delivery.
+        processed = sender.drain(conn)
+        if processed != 4:
+            problems.append(f"first drain processed {processed} messages, expected 4")
+        if sorted(server.received) != [f"user{n}@example.com" for n in range(3)]:
+            problems.append(f"stand-in received {server.received}")
+        if len(connects) != 1:
+            problems.append(f"opened {len(connects)} SMTP connections for one batch")
+
+        # Backoff, then dead-lettering.
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            status, attempts, due, error = rejected()
+            if attempts != attempt:
+                problems.append(f"after {attempt} rejections attempts is {attempts}")
+            if "550" not in (error or ""):
+                problems.append(f"last_error {error!r} does not carry the SMTP reply")
+            if attempt < MAX_ATTEMPTS:
+                expected = config.OUTBOX_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                if status != "pending" or due is None or abs(_delay(due) - expected) > 2:
+                    problems.append(
+                        f"after {attempt} rejections: status {status}, due {due}, "
+                        f"expected pending in {expected}s"
+                    )
+                processed = sender.drain(conn)
+                if processed:
+                    problems.append(f"retried {processed} messages before they were due")
+                with conn:
+                    conn.execute(
+                        "UPDATE email_outbox SET next_attempt_at = ? WHERE id = ?",
+                        (outbox._now(), rejected_id),
+                    )
+                sender.drain(conn)
+            elif status != "dead" or due is not None:
+                problems.append(f"after {attempt} rejections: status {status}, due {due}, expected dead")
+
+        processed = sender.drain(conn)
+        if processed:
+            problems.append(f"dead message was claimed again ({processed})")
+    finally:
+        sender.close()
+        conn.close()
+        database._pool.close_all()
+        database._pool = original_pool
+        for name, value in original_settings.items():
+            setattr(config, name, value)
+        server.close()
+        loop.join(5)
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    return problems
+
+
+if __name__ == "__main__":
+    problems = check_outbox()
+    for problem in problems:
+        print(f"OUTBOX  {problem}")
+    if problems:
+        sys.exit(1)
+    print("Outbox delivers, backs off and dead-letters as expected.")
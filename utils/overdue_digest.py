@@ -0,0 +1,114 @@
+"""Daily digest of overdue file returns, one email per borrower.
+
+    python -m utils.overdue_digest [--date YYYY-MM-DD] [--dry-run] [--no-send]
+
+Finds unreturned ``file_tracking`` records whose ``expected_return_date``
+has passed (one query on ``idx_file_tracking_expected_return``), groups
+them by ``taken_by_email`` and queues one digest per recipient in the
+email outbox.  Each queued digest is recorded in ``overdue_digests`` in
+the same transaction, so running the job again on the same day sends
+nothing new.  Unless ``--no-send`` is given the outbox is then drained
+over a single SMTP connection.
+"""
+import argparse
+import time
+from datetime import date
+from itertools import groupby
+
+from utils.database import create_connection
+from utils.outbox import Sender, queue_email, smtp_configured
+
+# Records are overdue once the expected return date has passed, until their
+# status starts with 'Returned'.
+_OVERDUE = """
+    SELECT ft.taken_by_email, ft.id, e.employee_code, e.name, ft.documents_taken,
+           ft.date_taken, ft.expected_return_date_iso
+    FROM file_tracking ft
+    JOIN employees e ON e.id = ft.employee_id
+    WHERE ft.expected_return_date_iso < ?
+      AND ifnull(ft.taken_by_email, '') != ''
+      AND ft.status_of_documents NOT LIKE 'returned%'
+      AND NOT EXISTS (
+          SELECT 1 FROM overdue_digests d
+          WHERE d.recipient = ft.taken_by_email AND d.digest_date = ?
+      )
+    ORDER BY ft.taken_by_email, ft.expected_return_date_iso, ft.id;
+"""
+
+
+def _digest_body(records, today):
+    lines = [
+        "Hi,",
+        "",
+        f"The following {len(records)} employee file(s) you took are past their "
+        f"expected return date as of {today}:",
+        "",
+    ]
+    for _, _, code, name, documents, date_taken, due in records:
+        lines.append(f"- {code} {name}: {documents} (taken {date_taken}, due {due})")
+    lines += ["", "Please return them as soon as possible.", "", "Thank you,", "Admin Team"]
+    return "\n".join(lines)
+
+
+def find_overdue(today, conn=None):
+    """Overdue records not yet covered by today's digests, grouped by recipient."""
+    conn = conn or create_connection()
+    rows = conn.execute(_OVERDUE, (today, today)).fetchall()
+    return [(email, list(records)) for email, records in groupby(rows, key=lambda r: r[0])]
+
+
+def queue_digests(today=None):
+    """Queue one digest per recipient and record it in the ledger.
+
+    Returns ``[(recipient, record_count)]`` for the digests queued.
+    """
+    today = today or date.today().isoformat()
+    conn = create_connection()
+    with conn:
+        # Take the write lock before reading so concurrent runs cannot both
+        # queue the same recipient's digest.
+        conn.execute("BEGIN IMMEDIATE")
+        digests = find_overdue(today, conn)
+        for recipient, records in digests:
+            email_id = queue_email(
+                recipient,
+                f"Overdue employee files: {len(records)} pending return",
+                _digest_body(records, today),
+                conn=conn,
+                wake=False,
+            )
+            conn.execute(
+                "INSERT INTO overdue_digests (recipient, digest_date, record_count, email_id, "
+                "created_at) VALUES (?, ?, ?, ?, datetime('now', 'localtime'))",
+                (recipient, today, len(records), email_id),
+            )
+    return [(recipient, len(records)) for recipient, records in digests]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email each borrower a digest of overdue files.")
+    parser.add_argument("--date", help="treat this YYYY-MM-DD as today")
+    parser.add_argument("--dry-run", action="store_true", help="list the digests without queuing them")
+    parser.add_argument("--no-send", action="store_true",
+                        help="queue only; leave sending to the outbox worker")
+    args = parser.parse_args()
+    today = args.date or date.today().isoformat()
+
+    if args.dry_run:
+        for recipient, records in find_overdue(today):
+            print(f"{recipient}: {len(records)} overdue")
+        raise SystemExit(0)
+    if not smtp_configured():
+        raise SystemExit("SMTP is not configured; set SMTP_SERVER (see config.py).")
+
+    started = time.perf_counter()
+    queued = queue_digests(today)
+    for recipient, count in queued:
+        print(f"Queued digest for {recipient} ({count} overdue)")
+    print(f"{len(queued)} digests queued for {today} in {time.perf_counter() - started:.2f}s")
+    if queued and not args.no_send:
+        sender = Sender()
+        try:
+            print(f"Processed {sender.drain()} emails from the outbox")
+        finally:
+            sender.close()
@@ -1,11 +1,76 @@
+"""Employee QR codes.
+
+Codes are rendered on demand by the ``/qr/<code>.<fmt>`` route into a
+content-addressed cache: the file name is a hash of everything that
+affects the image (encoded URL, box size, format), which doubles as a
+strong ETag, so a cached image never needs invalidating.
+"""
+import hashlib
+import os
+import tempfile
+
 import qrcode
+import qrcode.image.svg
+
+import config
+
+STATIC_QR_DIR = "static/qr_codes"
+QR_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+DEFAULT_BOX_SIZE = 10
+MAX_BOX_SIZE = 40
+# Bump when rendering changes in a way the cache key does not capture.
+_RENDER_VERSION = 1
+
+
+def qr_payload(employee_code):
+    """URL encoded in an employee's QR code."""
+    return f"{config.QR_BASE_URL}/employee/{employee_code}?next=/employee/{employee_code}"
+
+
+def qr_cache_key(employee_code, box_size=DEFAULT_BOX_SIZE, fmt="png"):
+    raw = f"{_RENDER_VERSION}\0{qr_payload(employee_code)}\0{box_size}\0{fmt}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _make_image(employee_code, box_size, fmt):
+    qr = qrcode.QRCode(box_size=box_size)
+    qr.add_data(qr_payload(employee_code))
+    if fmt == "svg":
+        return qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    return qr.make_image()
+
+
+def cached_qr_path(key, fmt="png"):
+    return os.path.join(config.QR_CACHE_DIR, key[:2], f"{key}.{fmt}")
+
+
+def _write_image(path, employee_code, box_size, fmt):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Each render (process or thread) writes its own temporary file, and the
+    # rename keeps readers from ever seeing a partial image.
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _make_image(employee_code, box_size, fmt).save(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
 
-def generate_qr_for_employee(employee_code):
-    # ✅ Use your local network IP, so mobiles can reach it
-    url = f"http://192.168.1.142:5000/employee/{employee_code}"
+def render_qr(employee_code, box_size=DEFAULT_BOX_SIZE, fmt="png"):
+    """Return ``(path, key)`` for the cached image, rendering it on a miss."""
+    key = qr_cache_key(employee_code, box_size, fmt)
+    path = cached_qr_path(key, fmt)
+    if not os.path.exists(path):
+        _write_image(path, employee_code, box_size, fmt)
+    return path, key
 
-    # ✅ Generate QR Code
-    img = qrcode.make(url)
 
-    # ✅ Save inside the static folder (use correct path based on your project structure)
-    img.save(f"static/qr_codes/{employee_code}.png")
+def generate_qr(employee_code, directory=STATIC_QR_DIR):
+    """Write ``<directory>/<code>.png`` and return its cache key."""
+    _write_image(
+        os.path.join(directory, f"{employee_code}.png"), employee_code, DEFAULT_BOX_SIZE, "png"
+    )
+    return qr_cache_key(employee_code)
@@ -0,0 +1,192 @@
+"""Check that every query in utils/database.py is served by an index.
+
+Each helper is called against a scratch copy of the database while the
+statements it runs are traced; every traced statement is then passed
+through ``EXPLAIN QUERY PLAN``.  A plan step that scans a whole table
+fails the check unless the helper is listed in ``ALLOWED_SCANS``.
+
+    python -m utils.query_plans [path/to/db]
+
+Exits non-zero when a helper scans a table or has no sample call in
+``_sample_calls`` (so new helpers cannot slip through unchecked).
+"""
+import inspect
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from flask import Flask
+
+from utils import database
+
+# Helpers that intentionally read a whole table, with the reason.
+ALLOWED_SCANS = {
+    "get_employee_counts_by_company": "reads the whole (per-company) rollup table",
+    "get_file_counts_by_month": "reads the whole (per-company, per-month) rollup table",
+}
+
+# Not data-access helpers.
+SKIPPED = {
+    "apply_connection_profile",
+    "check_connection_profile",
+    "create_connection",
+    "employee_sort_key",
+    "close_request_connection",
+    "employee_date_columns",
+    "init_app",
+    "own_connection",
+    "read_connection",
+    "report_connection",
+    "tracking_date_columns",
+}
+
+# Every SCAN step reads a whole table or index ("SCAN t USING INDEX i" walks
+# all of i); bounded index lookups are SEARCH steps.  A full-text MATCH shows
+# up as a virtual table scan with a non-empty index string.
+_SCAN = re.compile(r"^SCAN ([\w.]+)\b(?! VIRTUAL TABLE INDEX \d+:\S)")
+# Table references, so plan steps that name an alias can be mapped back.
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE)\s+([\w.]+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_NOT_ALIASES = {
+    "AS", "CROSS", "EXCEPT", "GROUP", "HAVING", "INDEXED", "INNER", "INTERSECT", "JOIN",
+    "LEFT", "LIMIT", "NATURAL", "NOT", "ON", "ORDER", "OUTER", "RETURNING", "SET",
+    "UNION", "USING", "WHERE", "WINDOW",
+}
+
+
+def _aliases(sql):
+    """Map the table aliases used in ``sql`` to their table names."""
+    return {
+        alias: table.split(".")[-1]
+        for table, alias in _TABLE_REF.findall(sql)
+        if alias and alias.upper() not in _NOT_ALIASES
+    }
+
+
+def _sample_calls(conn):
+    """Arguments to call each helper with, using rows from the database."""
+    employee = conn.execute("SELECT id, employee_code, company FROM employees LIMIT 1").fetchone()
+    employee_id, code, company = employee or (1, "10001", "Example Company")
+    companies = [company or "Example Company"]
+    tracking_id = (conn.execute("SELECT MAX(id) FROM file_tracking").fetchone()[0]) or 1
+    row = ("Z" + code, "Plan Check", "-", "-", "-", "-", "-", "-", "-", "-", "-", "-")
+    return {
+        "insert_employee": (row,),
+        "insert_checklist_entries": ([(employee_id, "PAN Card", "Yes", "a", "b", "2025-01-01", None, "a", "2025-01-01")],),
+        "insert_file_tracking_entry": ((employee_id, "2025-01-01", "a", None, "10.00am", "02/01/2025", "PAN Card", "Exit"),),
+        "insert_activity_log": ("Plan Check", "", code, "a", "2025-01-01 00:00:00"),
+        "insert_activity_logs": ([("Plan Check", "", code, "a", "2025-01-01 00:00:00")],),
+        "get_all_employees": ("company", (companies[0], employee_id), None, 50),
+        "get_employees_by_companies": (companies, "name", None, ("M", employee_id), 50),
+        "search_employees": ("Admin Unit", "unit", companies, "code", (code, employee_id), None, 50),
+        "count_employees": ("Admin Unit", "unit", companies),
+        "get_employee_detail": (code,),
+        "get_employee_by_id": (employee_id,),
+        "get_employee_by_code": (code,),
+        "get_unique_companies": (),
+        "insert_user_company": (1, companies[0]),
+        "get_companies_by_user": (1,),
+        "get_employee_counts_by_company": (companies,),
+        "get_file_counts_by_month": (companies,),
+        "get_activity_logs": ("superadmin", "Login", code, "2025-01-01", "2025-12-31", tracking_id, None, 50),
+        "get_activity_actions": (),
+        "add_user": ("plan_check_user", "x", "admin"),
+        "verify_user": ("superadmin", "x"),
+        "get_user_by_username": ("superadmin",),
+        "update_file_tracking_status": (tracking_id, "Returned"),
+        "update_file_tracking_entry": (tracking_id, "2025-01-01", "a", None, "10.00am", "02/01/2025", "PAN Card", "Exit"),
+        "update_tracking_email_and_return_date": (tracking_id, "a@example.com", "02/01/2025"),
+        "get_admin_users": (),
+        "delete_user": (0,),
+    }
+
+
+def _helpers():
+    for name, func in inspect.getmembers(database, inspect.isfunction):
+        if func.__module__ == database.__name__ and not name.startswith("_") and name not in SKIPPED:
+            yield name, func
+
+
+def check_query_plans(db_path=database.DB_NAME):
+    """Return a list of problems; an empty list means every query is indexed."""
+    scratch_dir = tempfile.mkdtemp()
+    scratch = os.path.join(scratch_dir, "plan_check.db")
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(scratch)
+    src.backup(dst)
+    src.close()
+    # Plan without ANALYZE statistics so tiny tables cannot hide a missing index.
+    if dst.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        dst.execute("DROP TABLE sqlite_stat1")
+        dst.commit()
+    dst.close()
+
+    app = Flask(__name__)
+    database.init_app(app)
+    original_pools = database._pool, database._read_pool, database._report_pool
+    database._pool = database.ConnectionPool(scratch, size=1)
+    database._read_pool = database.ConnectionPool(scratch, size=1, read_only=True)
+    database._report_pool = database.ConnectionPool(scratch, size=1, read_only=True)
+    problems = []
+    try:
+        with app.app_context():
+            conn = database.create_connection()
+            # Helpers read and write on separate connections; trace them all.
+            connections = {
+                id(c): c for c in (conn, database.read_connection(), database.report_connection())
+            }.values()
+            calls = _sample_calls(conn)
+            tables = {
+                name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            # Full-text tables run their own bookkeeping SQL on shadow tables.
+            virtual = [
+                name for (name,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE sql LIKE 'CREATE VIRTUAL TABLE%'"
+                )
+            ]
+            for name, func in _helpers():
+                if name not in calls:
+                    problems.append(f"{name}: no sample call in utils/query_plans.py")
+                    continue
+                statements = []
+                for traced in connections:
+                    traced.set_trace_callback(statements.append)
+                try:
+                    func(*calls[name])
+                finally:
+                    for traced in connections:
+                        traced.set_trace_callback(None)
+                for sql in statements:
+                    if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+                        continue
+                    aliases = _aliases(sql)
+                    for step in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+                        match = _SCAN.match(step[3])
+                        if not match or name in ALLOWED_SCANS:
+                            continue
+                        table = match.group(1).split(".")[-1]
+                        table = aliases.get(table, table)
+                        # CTEs and VALUES lists are scanned too but are not tables.
+                        if table not in tables:
+                            continue
+                        if not any(table.startswith(f"{v}_") for v in virtual):
+                            problems.append(f"{name}: {step[3]}")
+        database._pool.close_all()
+        database._read_pool.close_all()
+        database._report_pool.close_all()
+    finally:
+        database._pool, database._read_pool, database._report_pool = original_pools
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    return problems
+
+
+if __name__ == "__main__":
+    problems = check_query_plans(*sys.argv[1:2])
+    for problem in problems:
+        print(f"FULL SCAN  {problem}")
+    if problems:
+        sys.exit(1)
+    print("All queries use an index.")
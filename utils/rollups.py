@@ -0,0 +1,149 @@
+"""Pre-aggregated dashboard counts kept current by triggers.
+
+``company_employee_counts`` holds employees per company and
+``company_monthly_file_counts`` holds files taken per company per month.
+Employees without a company are stored under ``''``.  The triggers
+created by migration 4 keep both tables in step with every write, so
+``/dashboard`` reads a few dozen rows however large ``file_tracking``
+grows.  Rebuild them from scratch with ``python -m utils.rollups``.
+"""
+from utils.database import create_connection
+
+ROLLUP_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS company_employee_counts (
+        company TEXT PRIMARY KEY,
+        employee_count INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS company_monthly_file_counts (
+        company TEXT NOT NULL,
+        month TEXT NOT NULL,
+        file_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (company, month)
+    ) WITHOUT ROWID;
+    """,
+    # ---- employees ----
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_employees_insert AFTER INSERT ON employees
+    BEGIN
+        INSERT INTO company_employee_counts (company, employee_count)
+        VALUES (coalesce(NEW.company, ''), 1)
+        ON CONFLICT (company) DO UPDATE SET employee_count = employee_count + 1;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_employees_delete AFTER DELETE ON employees
+    BEGIN
+        UPDATE company_employee_counts SET employee_count = employee_count - 1
+        WHERE company = coalesce(OLD.company, '');
+        INSERT INTO company_monthly_file_counts (company, month, file_count)
+        SELECT company, month, delta FROM (
+            SELECT coalesce(OLD.company, '') AS company, substr(date_taken_iso, 1, 7) AS month,
+                   -COUNT(*) AS delta
+            FROM file_tracking WHERE employee_id = OLD.id AND date_taken_iso IS NOT NULL
+            GROUP BY month
+            UNION ALL
+            SELECT '', substr(date_taken_iso, 1, 7), COUNT(*)
+            FROM file_tracking WHERE employee_id = OLD.id AND date_taken_iso IS NOT NULL
+            GROUP BY 2
+        ) WHERE true
+        ON CONFLICT (company, month) DO UPDATE SET file_count = file_count + excluded.file_count;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_employees_company AFTER UPDATE OF company ON employees
+    WHEN coalesce(OLD.company, '') IS NOT coalesce(NEW.company, '')
+    BEGIN
+        UPDATE company_employee_counts SET employee_count = employee_count - 1
+        WHERE company = coalesce(OLD.company, '');
+        INSERT INTO company_employee_counts (company, employee_count)
+        VALUES (coalesce(NEW.company, ''), 1)
+        ON CONFLICT (company) DO UPDATE SET employee_count = employee_count + 1;
+        INSERT INTO company_monthly_file_counts (company, month, file_count)
+        SELECT company, month, delta FROM (
+            SELECT coalesce(OLD.company, '') AS company, substr(date_taken_iso, 1, 7) AS month,
+                   -COUNT(*) AS delta
+            FROM file_tracking WHERE employee_id = NEW.id AND date_taken_iso IS NOT NULL
+            GROUP BY month
+            UNION ALL
+            SELECT coalesce(NEW.company, ''), substr(date_taken_iso, 1, 7), COUNT(*)
+            FROM file_tracking WHERE employee_id = NEW.id AND date_taken_iso IS NOT NULL
+            GROUP BY 2
+        ) WHERE true
+        ON CONFLICT (company, month) DO UPDATE SET file_count = file_count + excluded.file_count;
+    END;
+    """,
+    # ---- file_tracking ----
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_file_tracking_insert AFTER INSERT ON file_tracking
+    WHEN NEW.date_taken_iso IS NOT NULL
+    BEGIN
+        INSERT INTO company_monthly_file_counts (company, month, file_count)
+        SELECT coalesce((SELECT company FROM employees WHERE id = NEW.employee_id), ''),
+               substr(NEW.date_taken_iso, 1, 7), 1
+        WHERE true
+        ON CONFLICT (company, month) DO UPDATE SET file_count = file_count + 1;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_file_tracking_delete AFTER DELETE ON file_tracking
+    WHEN OLD.date_taken_iso IS NOT NULL
+    BEGIN
+        UPDATE company_monthly_file_counts SET file_count = file_count - 1
+        WHERE company = coalesce((SELECT company FROM employees WHERE id = OLD.employee_id), '')
+          AND month = substr(OLD.date_taken_iso, 1, 7);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS rollup_file_tracking_update
+    AFTER UPDATE OF employee_id, date_taken_iso ON file_tracking
+    BEGIN
+        UPDATE company_monthly_file_counts SET file_count = file_count - 1
+        WHERE OLD.date_taken_iso IS NOT NULL
+          AND company = coalesce((SELECT company FROM employees WHERE id = OLD.employee_id), '')
+          AND month = substr(OLD.date_taken_iso, 1, 7);
+        INSERT INTO company_monthly_file_counts (company, month, file_count)
+        SELECT coalesce((SELECT company FROM employees WHERE id = NEW.employee_id), ''),
+               substr(NEW.date_taken_iso, 1, 7), 1
+        WHERE NEW.date_taken_iso IS NOT NULL
+        ON CONFLICT (company, month) DO UPDATE SET file_count = file_count + 1;
+    END;
+    """,
+]
+
+
+def create_rollups(conn):
+    for statement in ROLLUP_SCHEMA:
+        conn.execute(statement)
+
+
+def rebuild_rollups(conn):
+    """Recompute both rollup tables from the base tables."""
+    conn.execute("DELETE FROM company_employee_counts;")
+    conn.execute("DELETE FROM company_monthly_file_counts;")
+    conn.execute("""
+        INSERT INTO company_employee_counts (company, employee_count)
+        SELECT coalesce(company, ''), COUNT(*) FROM employees GROUP BY 1;
+    """)
+    conn.execute("""
+        INSERT INTO company_monthly_file_counts (company, month, file_count)
+        SELECT coalesce(e.company, ''), substr(ft.date_taken_iso, 1, 7), COUNT(*)
+        FROM file_tracking ft
+        LEFT JOIN employees e ON e.id = ft.employee_id
+        WHERE ft.date_taken_iso IS NOT NULL
+        GROUP BY 1, 2;
+    """)
+
+
+if __name__ == "__main__":
+    conn = create_connection()
+    with conn:
+        rebuild_rollups(conn)
+    employees, months = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM company_employee_counts), "
+        "(SELECT COUNT(*) FROM company_monthly_file_counts)"
+    ).fetchone()
+    print(f"Rebuilt {employees} company rows and {months} company/month rows")
+    conn.close()
@@ -0,0 +1,181 @@
+"""Per-request SQL instrumentation.
+
+Pooled connections are created with :class:`TracingConnection`, which
+records the text, row count and time (execute plus fetches) of every
+statement.  Inside a request the records collect on ``g.sql_trace``; when
+the response goes out they are summed into a ``Server-Timing`` header,
+statements slower than ``SLOW_QUERY_MS`` are written to
+``logs/slow_queries.log``, and per-statement totals are kept in memory for
+the ``/sql_stats`` page.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+from time import perf_counter
+
+from flask import g, has_app_context, request
+
+import config
+
+SLOW_QUERY_LOG = 'logs/slow_queries.log'
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROW_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+
+_stats = {}  # normalized sql -> [calls, total seconds, max seconds, rows]
+_stats_lock = threading.Lock()
+_slow_log = None
+
+
+class Query:
+    __slots__ = ("sql", "rows", "seconds")
+
+    def __init__(self, sql, rows, seconds):
+        self.sql = sql
+        self.rows = rows
+        self.seconds = seconds
+
+
+def _record(sql, rows, seconds):
+    query = Query(sql, max(rows, 0), seconds)
+    if has_app_context():
+        g.setdefault("sql_trace", []).append(query)
+    return query
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that times its statement, including the time spent fetching."""
+
+    _query = None
+
+    def execute(self, sql, parameters=()):
+        started = perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._query = _record(sql, self.rowcount, perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._query = _record(sql, self.rowcount, perf_counter() - started)
+
+    def _fetched(self, rows, started):
+        if self._query is not None:
+            self._query.rows += rows
+            self._query.seconds += perf_counter() - started
+
+    def fetchone(self):
+        started = perf_counter()
+        row = super().fetchone()
+        self._fetched(row is not None, started)
+        return row
+
+    def fetchmany(self, size=None):
+        started = perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), started)
+        return rows
+
+    def fetchall(self):
+        started = perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), started)
+        return rows
+
+    def __next__(self):
+        started = perf_counter()
+        row = super().__next__()
+        self._fetched(1, started)
+        return row
+
+
+class TracingConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``execute`` shortcuts) are traced."""
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def normalize_sql(sql):
+    """Collapse whitespace, literals and IN/VALUES lists so variants group together."""
+    sql = " ".join(sql.split())
+    sql = _LITERALS.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _ROW_LIST.sub("(...), ...", sql)
+
+
+def _slow_query_logger():
+    global _slow_log
+    if _slow_log is None:
+        os.makedirs(os.path.dirname(SLOW_QUERY_LOG), exist_ok=True)
+        handler = logging.FileHandler(SLOW_QUERY_LOG, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        logger = logging.getLogger('sql_trace.slow')
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _slow_log = logger
+    return _slow_log
+
+
+def _finish_request(response):
+    queries = g.pop("sql_trace", [])
+    if not queries:
+        return response
+    total = sum(q.seconds for q in queries)
+    response.headers.add(
+        "Server-Timing", f'db;dur={total * 1000:.2f};desc="{len(queries)} queries"'
+    )
+    threshold = config.SLOW_QUERY_MS / 1000
+    with _stats_lock:
+        for q in queries:
+            entry = _stats.setdefault(normalize_sql(q.sql), [0, 0.0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += q.seconds
+            entry[2] = max(entry[2], q.seconds)
+            entry[3] += q.rows
+    for q in queries:
+        if q.seconds >= threshold:
+            _slow_query_logger().info(
+                "%.1fms rows=%d %s %s", q.seconds * 1000, q.rows, request.path,
+                " ".join(q.sql.split()),
+            )
+    return response
+
+
+def slowest_queries(n=20, order="max"):
+    """Return the ``n`` slowest statements since startup as dicts.
+
+    ``order`` is ``"max"`` (slowest single run) or ``"total"`` (most time overall).
+    """
+    with _stats_lock:
+        items = [(sql, *entry) for sql, entry in _stats.items()]
+    key = 2 if order == "total" else 3
+    items.sort(key=lambda item: item[key], reverse=True)
+    return [
+        {
+            "sql": sql,
+            "calls": calls,
+            "total_ms": total * 1000,
+            "avg_ms": total * 1000 / calls,
+            "max_ms": longest * 1000,
+            "rows": rows,
+        }
+        for sql, calls, total, longest, rows in items[:n]
+    ]
+
+
+def init_app(app):
+    app.after_request(_finish_request)